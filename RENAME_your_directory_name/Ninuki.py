@@ -8,9 +8,18 @@ Written by Cmput 455 TA and Martin Mueller
 from gtp_connection import GtpConnection, format_point, point_to_coord
 from board_base import DEFAULT_SIZE, GO_POINT, GO_COLOR
 from board import GoBoard
+from bitboard import BitBoard
 from board_util import GoBoardUtil
 from engine import GoEngine
+from mcts_tree import SearchTree, ROOT
+from batch_board import BatchBoard
+from deadline import Deadline
+from capture_search import capture_win, find_capture_win, CAPTURES_TO_WIN, RACE_CAPTURES
+import sys
 import time
+import multiprocessing
+import atexit
+import numpy as np
 import random
 from board_base import (
     BLACK,
@@ -19,58 +28,24 @@ from board_base import (
     BORDER,
     GO_COLOR, GO_POINT,
     PASS,
+    NO_POINT,
     MAXSIZE,
     coord_to_point,
     opponent
 )
-import math
-
-class Node:
-    def __init__(self, board, move=None, parent=None):
-        self.board = board
-        self.move = move
-        self.parent = parent
-        self.children = []
-        self.visits = 0
-        self.wins = 0
-
-    def UCTSelectChild(self):
-        # Select a child node based on UCT (Upper Confidence Bound for Trees) formula
-        log_total_visits = math.log(self.visits)
-        child = max(self.children, key=lambda c: c.wins / c.visits + math.sqrt(2 * log_total_visits / c.visits))
-        return child
-
-    def AddChild(self, move, state):
-        # Add a child node for a given move and state
-        child = Node(board=state.copy(), move=move, parent=self)
-        self.children.append(child)
-        return child
-
-    def Update(self, result):
-        # Update the node's statistics with the result of a simulation
-        self.visits += 1
-        self.wins += result
-
-    def TreeToString(self, indent):
-        # Output the tree structure as a string (for debugging)
-        s = self.IndentString(indent) + str(self)
-        for child in self.children:
-            s += child.TreeToString(indent + 1)
-        return s
-
-    def ChildrenToString(self):
-        # Output the children as a string (for debugging)
-        s = ""
-        for child in self.children:
-            s += str(child) + "\n"
-        return s
-
-    def IndentString(self, indent):
-        # Helper method for indentation
-        s = "\n"
-        for _ in range(indent):
-            s += "| "
-        return s
+
+"""
+Seconds reserved for sending the position to the worker processes
+and merging their results within the time limit
+"""
+POOL_MARGIN = 0.1
+
+"""
+Attacker moves and nodes of the capture race search run at a new leaf,
+kept small because it runs in every simulation that reaches the race
+"""
+ORACLE_MOVES = 2
+ORACLE_NODES = 200
 
 def ninuki_heuristic(board, move, color):
     # Copy the board to simulate the move
@@ -115,67 +90,174 @@ class MCTSPlayer(GoEngine):
         self.time_limit = 1
         self.initial_simulations = 1000  # Initial number of simulations
         self.ucb_constant = 1.1
+        # uniformly random rollouts played in lockstep per simulation on a
+        # BatchBoard, 0 for one rollout with the heuristic policy
+        self.options["rollouts"] = 0
+        self.rng = np.random.default_rng()
+        # search tree kept between moves, and the position at its root
+        self.tree: SearchTree = None
+        self.tree_position = None
+        # processes searching in parallel on genmove, see start_pool
+        self.options["workers"] = 1
+        self.pool = None
+
+    @staticmethod
+    def position_key(board: GoBoard):
+        return (board.board.tobytes(), board.current_player,
+                board.black_captures, board.white_captures)
+
+    def reset(self) -> None:
+        self.tree = None
+        self.tree_position = None
+
+    def notify_move(self, board: GoBoard, move: GO_POINT) -> None:
+        """
+        Promote the child for move to the root of the kept tree,
+        discarding its siblings. board is the position after move.
+        """
+        if self.tree is None:
+            return
+        child = self.tree.find_child(ROOT, move)
+        if child < 0:
+            self.reset()
+            return
+        self.tree = self.tree.subtree(child)
+        self.tree_position = self.position_key(board)
+
+    def start_pool(self) -> None:
+        """
+        Search with the workers option processes in total: this one plus
+        a pool of workers - 1 pre-forked processes, started here so that
+        genmove does not pay for the startup.
+        """
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool = None
+        workers = self.options["workers"]
+        if workers > 1:
+            self.pool = multiprocessing.Pool(workers - 1, initializer=_init_worker)
+            atexit.register(self.pool.terminate)
 
     def get_move(self, board: GoBoard, color: GO_COLOR) -> GO_POINT:
-        root = Node(board.copy())
-        start_time = time.time()
-        remaining_time = self.time_limit
-
-        while time.time() - start_time < remaining_time:
-            node = root
-            state = board.copy()
-
-            # Select
-            while node.children != []:  # node is fully expanded and non-terminal
-                node = node.UCTSelectChild()
-                state.play_move(node.move, state.current_player)
-
-            # Expand
-            if not state.is_terminal()[0]:  # if the state is non-terminal
-                legal_moves = GoBoardUtil.generate_legal_moves(state, state.current_player)
-                
-                #Calculate move values
-                move_values = [(child.wins / child.visits) if child.visits > 0 else 0 for child in node.children]
-                
-                if move_values:
-                    # Choose the move with the maximum value
-                    m = legal_moves[move_values.index(max(move_values))]
-                else:
-                    # If move_values is empty, choose a random move
-                    m = random.choice(legal_moves)
-                
-                state.play_move(m, state.current_player)
-                node = node.AddChild(m, state)  # add child and descend tree
-
-            # Rollout
-            while not state.is_terminal()[0]:  # while state is non-terminal
-                legal_moves = GoBoardUtil.generate_legal_moves(state, state.current_player)
-                if not legal_moves:
-                    break  # No legal moves left
-
-                values = [self.heuristic(state, move, state.current_player) for move in legal_moves]
-                best_move = legal_moves[values.index(max(values))]
-
-                
-                if best_move not in legal_moves:
-                    # If the chosen move is not legal, choose a random legal move
-                    best_move = random.choice(legal_moves)
-
-                state.play_move(best_move, state.current_player)
-
-            # Backpropagate
-            result = state.is_terminal()[1]
-            while node is not None:  # backpropagate from the expanded node and work back to the root node
-                node.Update(result)
-                node = node.parent
-
-            # Adjust the number of simulations dynamically
-            remaining_time = self.time_limit - (time.time() - start_time)
-            if remaining_time > 0:
-                self.adjust_simulations(remaining_time)
+        if self.tree is None or self.tree_position != self.position_key(board):
+            self.tree = SearchTree()
+            self.tree_position = self.position_key(board)
+        time_limit = self.time_limit
+        pending = None
+        if self.pool is not None:
+            # root parallel: every worker grows its own tree from board
+            time_limit -= POOL_MARGIN
+            seeds = [random.getrandbits(32) for _ in range(self.options["workers"] - 1)]
+            rollouts = self.options["rollouts"]
+            pending = self.pool.map_async(
+                _search_worker, [(board, time_limit, seed, rollouts) for seed in seeds])
+        self.search(self.tree, board, time_limit)
+
+        # Merge the root child statistics of all trees by move
+        visits = np.zeros(board.maxpoint)
+        moves, child_visits, _ = self.tree.child_statistics(ROOT)
+        np.add.at(visits, moves, child_visits)
+        if pending is not None:
+            try:
+                for moves, child_visits, _ in pending.get(timeout=POOL_MARGIN):
+                    np.add.at(visits, moves, child_visits)
+            except multiprocessing.TimeoutError:
+                pass  # late or failed workers: use the local tree only
 
         # Return the move that was most visited
-        return sorted(root.children, key=lambda c: c.visits)[-1].move
+        if visits.max() == 0:
+            return random.choice(GoBoardUtil.generate_legal_moves(board, board.current_player))
+        return int(np.argmax(visits))
+
+    def search(self, tree: SearchTree, board: GoBoard, time_limit: float) -> None:
+        """
+        Run simulations from board into tree for time_limit seconds.
+        """
+        deadline = Deadline(time.time() + time_limit)
+        simulations = 0
+
+        while True:
+            if simulations >= deadline.next_poll:
+                if deadline.poll(simulations):
+                    break
+                # Adjust the number of simulations dynamically
+                self.adjust_simulations(deadline.end_time - deadline.last_poll)
+            self.simulate(tree, board)
+            simulations += 1
+
+    def simulate(self, tree: SearchTree, board: GoBoard) -> None:
+        """
+        Run one simulation from the root position board, adding at most
+        one node expansion to tree.
+        """
+        node = ROOT
+        state = board.copy()
+        # path holds (node, color of the player who made the move into node)
+        path = [(ROOT, opponent(state.current_player))]
+
+        # Select: replay the moves of the tree path on the root board
+        while not tree.is_leaf(node):
+            node = tree.select_child(node)
+            path.append((node, state.current_player))
+            state.play_move(int(tree.move[node]), state.current_player)
+
+        # Expand: add all children at once, then step into the first one
+        if not state.is_terminal()[0]:  # if the state is non-terminal
+            legal_moves = GoBoardUtil.generate_legal_moves(state, state.current_player)
+            if legal_moves:
+                # random order breaks ties between unvisited children,
+                # so that parallel trees explore different moves
+                random.shuffle(legal_moves)
+                tree.expand(node, legal_moves)
+                node = tree.select_child(node)
+                path.append((node, state.current_player))
+                state.play_move(int(tree.move[node]), state.current_player)
+
+        # A forced capture win decides the simulation without a rollout
+        winner = None
+        if not state.is_terminal()[0] and state.get_captures(state.current_player) >= RACE_CAPTURES:
+            move, _ = find_capture_win(state, max_moves=ORACLE_MOVES, max_nodes=ORACLE_NODES)
+            if move != NO_POINT:
+                winner = state.current_player
+
+        # Rollout: the result of each color, 0.5 for a draw
+        rollouts = self.options["rollouts"]
+        if winner is None and rollouts > 0 and not state.is_terminal()[0]:
+            winners = BatchBoard.from_board(state, rollouts).play_random_games(self.rng)
+            draws = np.count_nonzero(winners == EMPTY) / 2
+            result = {color: (np.count_nonzero(winners == color) + draws) / rollouts
+                      for color in (BLACK, WHITE)}
+        else:
+            if winner is None:
+                winner = self.rollout(state)
+            result = {color: 1.0 if winner == color else 0.5 if winner == EMPTY else 0.0
+                      for color in (BLACK, WHITE)}
+
+        # Backpropagate
+        for node, mover in path:
+            tree.update(node, result[mover])
+
+    def rollout(self, state: GoBoard) -> GO_COLOR:
+        """
+        Play out state with the heuristic policy until the game ends.
+        A capture that reaches 10 captures is always played.
+        Returns the winner, EMPTY for a draw.
+        """
+        while not state.is_terminal()[0]:  # while state is non-terminal
+            legal_moves = GoBoardUtil.generate_legal_moves(state, state.current_player)
+            if not legal_moves:
+                break  # No legal moves left
+
+            if state.get_captures(state.current_player) >= CAPTURES_TO_WIN - 2:
+                move = capture_win(state, state.current_player)
+                if move != NO_POINT:
+                    state.play_move(move, state.current_player)
+                    break
+
+            values = [self.heuristic(state, move, state.current_player) for move in legal_moves]
+            best_move = legal_moves[values.index(max(values))]
+            state.play_move(best_move, state.current_player)
+        return state.is_terminal()[1]
 
     def adjust_simulations(self, remaining_time):
         # Adjust the number of simulations based on remaining time
@@ -187,14 +269,51 @@ class MCTSPlayer(GoEngine):
     def set_time_limit(self, time_limit):
         self.time_limit = time_limit
 
+    def set_option(self, name: str, value: str) -> None:
+        previous = self.options.get(name)
+        GoEngine.set_option(self, name, value)
+        if name == "rollouts" and self.options["rollouts"] < 0:
+            self.options["rollouts"] = previous
+            raise ValueError("rollouts must not be negative")
+        if name == "workers":
+            if self.options["workers"] < 1:
+                self.options["workers"] = previous
+                raise ValueError("number of workers must be at least 1")
+            self.start_pool()
+
 
     def heuristic(self, board, move, color):
         return ninuki_heuristic(board, move, color)
 
 
+"""
+Player of a root-parallel worker process, see MCTSPlayer.start_pool
+"""
+_worker_player: MCTSPlayer = None
+
+
+def _init_worker() -> None:
+    global _worker_player
+    _worker_player = MCTSPlayer()
+
+
+def _search_worker(args):
+    """
+    Search a fresh tree and return the statistics of its root children.
+    """
+    board, time_limit, seed, rollouts = args
+    random.seed(seed)
+    _worker_player.rng = np.random.default_rng(seed)
+    _worker_player.options["rollouts"] = rollouts
+    tree = SearchTree()
+    _worker_player.search(tree, board, time_limit)
+    return tree.child_statistics(ROOT)
+
 
 def run() -> None:
-    board: GoBoard = GoBoard(MAXSIZE)
+    # The bitmask board backend is the default, pass --goboard for GoBoard
+    board_class = GoBoard if "--goboard" in sys.argv[1:] else BitBoard
+    board: GoBoard = board_class(MAXSIZE)
     con: GtpConnection = GtpConnection(MCTSPlayer(), board)
     con.start_connection()
 
@@ -0,0 +1,256 @@
+"""
+batch_board.py
+Vectorized Ninuki board for playing many games in lockstep.
+
+BatchBoard holds N positions of the same size as the rows of one
+2D numpy array, in the padded 1D encoding of GoBoard (see coord_to_point).
+Every operation works on the whole batch with a few numpy calls, which
+makes it suitable for random rollouts and self-play.
+The rules match GoBoard.play_move: a move on an occupied point is not
+played, and a move captures every XOOX pattern it completes.
+"""
+
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+
+from board_base import (
+    board_array_size,
+    coord_to_point,
+    BLACK,
+    WHITE,
+    EMPTY,
+    NO_POINT,
+    PASS,
+    GO_POINT,
+)
+from board import GoBoard
+
+"""
+Window tables per board size, see _window_tables.
+"""
+_WINDOW_TABLE_CACHE: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+
+
+def _window_tables(size: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Returns (windows, point_windows):
+        windows:       (num_windows + 1, 5) array with the points of every
+                       5-point window. The last row is a dummy window of
+                       BORDER points used as padding.
+        point_windows: (maxpoint, k) array with the ids of the windows
+                       through each point, padded with the dummy window.
+    """
+    if size not in _WINDOW_TABLE_CACHE:
+        maxpoint = board_array_size(size)
+        windows: List[List[int]] = []
+        through: List[List[int]] = [[] for _ in range(maxpoint)]
+        for row in range(1, size + 1):
+            for col in range(1, size + 1):
+                for dr, dc in [(1, 0), (0, 1), (1, 1), (1, -1)]:
+                    end_row, end_col = row + 4 * dr, col + 4 * dc
+                    if not (1 <= end_row <= size and 1 <= end_col <= size):
+                        continue
+                    window = [coord_to_point(row + i * dr, col + i * dc, size) for i in range(5)]
+                    for p in window:
+                        through[p].append(len(windows))
+                    windows.append(window)
+        dummy = len(windows)
+        windows.append([0] * 5)
+        width = max(1, max(len(w) for w in through))
+        point_windows = np.full((maxpoint, width), dummy, dtype=np.int32)
+        for p, ids in enumerate(through):
+            point_windows[p, :len(ids)] = ids
+        _WINDOW_TABLE_CACHE[size] = (np.array(windows, dtype=np.int32), point_windows)
+    return _WINDOW_TABLE_CACHE[size]
+
+
+class BatchBoard(object):
+    def __init__(self, size: int, num_games: int) -> None:
+        """
+        Creates num_games empty boards of the given size.
+        """
+        self.size: int = size
+        self.NS: int = size + 1
+        self.num_games: int = num_games
+        self.maxpoint: int = board_array_size(size)
+        self.offsets = np.array([1, -1, self.NS, -self.NS, self.NS + 1, -(self.NS + 1),
+                                 self.NS - 1, -self.NS + 1], dtype=np.int64)
+        self.windows, self.point_windows = _window_tables(size)
+        empty_board = GoBoard(size).board
+        self.board: np.ndarray = np.tile(empty_board, (num_games, 1))
+        self.current_player: np.ndarray = np.full(num_games, BLACK, dtype=GO_POINT)
+        self.last_move: np.ndarray = np.full(num_games, NO_POINT, dtype=np.int64)
+        self.captures: np.ndarray = np.zeros((num_games, 3), dtype=np.int32)
+        # one (points, colors, played, captured, last_move) entry per play_moves call, for undo
+        self.history: List[Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]] = []
+
+    @staticmethod
+    def from_board(board: GoBoard, num_games: int) -> 'BatchBoard':
+        """
+        Returns a batch of num_games copies of the position on board.
+        Undo history is not copied.
+        """
+        batch = BatchBoard(board.size, num_games)
+        batch.board[:] = board.board
+        batch.current_player[:] = board.current_player
+        batch.last_move[:] = board.last_move
+        batch.captures[:, BLACK] = board.black_captures
+        batch.captures[:, WHITE] = board.white_captures
+        return batch
+
+    def legal_moves_mask(self) -> np.ndarray:
+        """
+        Returns a (num_games, maxpoint) bool array of the empty points.
+        """
+        return self.board == EMPTY
+
+    def play_moves(self, points: np.ndarray, colors: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Play points[i] for colors[i] in game i, resolving captures.
+        colors defaults to the player to move in each game.
+        Games with a PASS or NO_POINT move, or an occupied point, are left unchanged.
+        Returns the bool array of the games where a stone was played.
+        """
+        points = np.asarray(points, dtype=np.int64)
+        if colors is None:
+            colors = self.current_player.copy()
+        colors = np.asarray(colors, dtype=GO_POINT)
+        opponents = WHITE + BLACK - colors
+        games = np.arange(self.num_games)
+        on_array = (points >= 0) & (points < self.maxpoint)
+        safe_points = np.where(on_array, points, 0)
+        played = on_array & (self.board[games, safe_points] == EMPTY)
+
+        self.board[games[played], safe_points[played]] = colors[played]
+
+        # capture patterns: (num_games, 8) candidate positions at distance 1, 2, 3
+        p1 = safe_points[:, None] + self.offsets[None, :]
+        p2 = p1 + self.offsets[None, :]
+        p3 = p2 + self.offsets[None, :]
+        in_range = (p3 >= 0) & (p3 < self.maxpoint) & played[:, None]
+        p1 = np.where(in_range, p1, 0)
+        p2 = np.where(in_range, p2, 0)
+        p3 = np.where(in_range, p3, 0)
+        rows = games[:, None]
+        captured = in_range \
+            & (self.board[rows, p1] == opponents[:, None]) \
+            & (self.board[rows, p2] == opponents[:, None]) \
+            & (self.board[rows, p3] == colors[:, None])
+        cap_games, cap_dirs = np.nonzero(captured)
+        self.board[cap_games, p1[cap_games, cap_dirs]] = EMPTY
+        self.board[cap_games, p2[cap_games, cap_dirs]] = EMPTY
+        np.add.at(self.captures, (cap_games, colors[cap_games]), 2)
+
+        previous_last = self.last_move.copy()
+        self.last_move[played] = points[played]
+        self.current_player[played] = opponents[played]
+        self.history.append((points, colors, played, captured, previous_last))
+        return played
+
+    def undo(self) -> None:
+        """
+        Undo the last play_moves call in every game.
+        """
+        points, colors, played, captured, previous_last = self.history.pop()
+        opponents = WHITE + BLACK - colors
+        games = np.arange(self.num_games)
+        cap_games, cap_dirs = np.nonzero(captured)
+        p1 = points[cap_games] + self.offsets[cap_dirs]
+        p2 = p1 + self.offsets[cap_dirs]
+        self.board[cap_games, p1] = opponents[cap_games]
+        self.board[cap_games, p2] = opponents[cap_games]
+        np.add.at(self.captures, (cap_games, colors[cap_games]), -2)
+        self.board[games[played], points[played]] = EMPTY
+        self.current_player[played] = colors[played]
+        self.last_move = previous_last
+
+    def detect_five_in_a_row(self) -> np.ndarray:
+        """
+        Returns, per game, the color of the last move if it made five in a row,
+        EMPTY otherwise.
+        """
+        last = np.where(self.last_move >= 0, self.last_move, 0)
+        games = np.arange(self.num_games)
+        color = self.board[games, last]
+        stones = self.board[games[:, None, None], self.windows[self.point_windows[last]]]
+        five = (stones == color[:, None, None]).all(axis=2).any(axis=1)
+        five &= (self.last_move >= 0) & ((color == BLACK) | (color == WHITE))
+        return np.where(five, color, EMPTY).astype(GO_POINT)
+
+    def is_terminal(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns: is_terminal, winner, both arrays over the batch.
+        The winner of a drawn or unfinished game is EMPTY.
+        Same order of checks as GoBoard.is_terminal.
+        """
+        winner = self.detect_five_in_a_row()
+        winner = np.where((winner == EMPTY) & (self.captures[:, BLACK] >= 10), BLACK, winner)
+        winner = np.where((winner == EMPTY) & (self.captures[:, WHITE] >= 10), WHITE, winner)
+        full = ~(self.board == EMPTY).any(axis=1)
+        return (winner != EMPTY) | full, winner.astype(GO_POINT)
+
+    def random_moves(self, rng: np.random.Generator) -> np.ndarray:
+        """
+        Returns a uniformly random empty point for each game, PASS if there is none.
+        """
+        keys = rng.random((self.num_games, self.maxpoint))
+        keys[self.board != EMPTY] = -1.0
+        moves = keys.argmax(axis=1)
+        return np.where(keys[np.arange(self.num_games), moves] >= 0, moves, PASS)
+
+    def winning_moves(self) -> np.ndarray:
+        """
+        Returns, per game, a point where the player to move makes five
+        in a row, NO_POINT if there is none.
+        """
+        stones = self.board[:, self.windows[:-1]]
+        own = (stones == self.current_player[:, None, None]).sum(axis=2)
+        empty = stones == EMPTY
+        # four stones and an empty point: nothing else fits in the window
+        wins = (own == 4) & empty.any(axis=2)
+        games = np.arange(self.num_games)
+        window = wins.argmax(axis=1)
+        points = self.windows[window, empty[games, window].argmax(axis=1)]
+        return np.where(wins.any(axis=1), points, NO_POINT)
+
+    def capture_wins(self) -> np.ndarray:
+        """
+        Returns, per game, a point where the player to move captures a
+        pair and reaches 10 captures, NO_POINT if there is none.
+        Only games where one pair is enough to win are checked.
+        """
+        games = np.arange(self.num_games)
+        racing = self.captures[games, self.current_player] >= 10 - 2
+        points = np.full(self.num_games, NO_POINT, dtype=np.int64)
+        if not racing.any():
+            return points
+        stones = self.board[racing]
+        color = self.current_player[racing][:, None]
+        opponent = WHITE + BLACK - color
+        n = self.maxpoint
+        found = np.zeros(stones.shape, dtype=bool)
+        for offset in self.offsets:
+            lo = max(0, -3 * offset)
+            hi = min(n, n - 3 * offset)
+            found[:, lo:hi] |= (stones[:, lo:hi] == EMPTY) \
+                & (stones[:, lo + offset:hi + offset] == opponent) \
+                & (stones[:, lo + 2 * offset:hi + 2 * offset] == opponent) \
+                & (stones[:, lo + 3 * offset:hi + 3 * offset] == color)
+        points[racing] = np.where(found.any(axis=1), found.argmax(axis=1), NO_POINT)
+        return points
+
+    def play_random_games(self, rng: np.random.Generator) -> np.ndarray:
+        """
+        Plays uniformly random moves in all games until each one is over,
+        except that a move which wins at once, by five in a row or by
+        captures, is always played.
+        Returns the winner of each game, EMPTY for a draw.
+        """
+        terminal, winner = self.is_terminal()
+        while not terminal.all():
+            moves = self.winning_moves()
+            moves = np.where(moves == NO_POINT, self.capture_wins(), moves)
+            moves = np.where(moves == NO_POINT, self.random_moves(rng), moves)
+            self.play_moves(np.where(terminal, PASS, moves))
+            terminal, winner = self.is_terminal()
+        return winner
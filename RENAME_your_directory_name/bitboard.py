@@ -0,0 +1,289 @@
+"""
+bitboard.py
+Bitmask board backend for Ninuki, used by default by both players.
+
+BitBoard keeps the position in one Python int bitmask per color
+instead of a padded numpy array. Bit i of a mask is array index i
+of the padded 1D representation used by GoBoard (see coord_to_point),
+so points, moves and GTP coordinates are identical for both backends.
+
+Five-in-a-row, capture patterns and empty-point queries are
+shift-and-mask operations on these integers. BitBoard is a drop-in
+replacement for GoBoard: engines only ever see the GoBoard interface,
+and board.copy() keeps the backend, so a player selects it by
+constructing its GtpConnection with a BitBoard.
+"""
+
+import numpy as np
+from typing import Dict, List, Tuple
+
+from board_base import (
+    board_array_size,
+    coord_to_point,
+    opponent,
+    BLACK,
+    WHITE,
+    EMPTY,
+    BORDER,
+    NO_POINT,
+    PASS,
+    GO_COLOR,
+    GO_POINT,
+)
+from board import GoBoard
+
+
+"""
+Per board size tables, computed once and shared by all BitBoards:
+    on_board:  mask of all points on the board
+    shifts:    bit distance between neighbors in the 4 line directions
+    captures:  for each point, the (pair mask, end mask, p1, p2) tuples
+               of the XOOX capture patterns starting at that point
+    neighbors: for each point, the mask of the first stones of its
+               capture patterns, used to skip the pattern loop
+    num_points: size * size
+"""
+_TABLES: Dict[int, Tuple[int, List[int], List[List[Tuple[int, int, int, int]]], List[int], int]] = {}
+
+
+def _size_tables(size: int) -> Tuple[int, List[int], List[List[Tuple[int, int, int, int]]], List[int], int]:
+    if size not in _TABLES:
+        NS = size + 1
+        points = [coord_to_point(row, col, size)
+                  for row in range(1, size + 1)
+                  for col in range(1, size + 1)]
+        on_board_points = set(int(p) for p in points)
+        on_board = 0
+        for p in on_board_points:
+            on_board |= 1 << p
+        offsets = [1, -1, NS, -NS, NS + 1, -(NS + 1), NS - 1, -NS + 1]
+        captures: List[List[Tuple[int, int, int, int]]] = [[] for _ in range(board_array_size(size))]
+        neighbors: List[int] = [0] * board_array_size(size)
+        for p in on_board_points:
+            for offset in offsets:
+                p1, p2, p3 = p + offset, p + 2 * offset, p + 3 * offset
+                if p1 in on_board_points and p2 in on_board_points and p3 in on_board_points:
+                    captures[p].append(((1 << p1) | (1 << p2), 1 << p3, p1, p2))
+                    neighbors[p] |= 1 << p1
+        _TABLES[size] = (on_board, [1, NS, NS + 1, NS - 1], captures, neighbors, len(points))
+    return _TABLES[size]
+
+
+def has_five(mask: int, shifts: List[int]) -> bool:
+    """
+    Return whether mask contains five consecutive bits along any
+    of the line directions given by shifts.
+    """
+    for d in shifts:
+        pairs = mask & (mask >> d)
+        fours = pairs & (pairs >> (2 * d))
+        if fours & (mask >> (4 * d)):
+            return True
+    return False
+
+
+class BitBoard(GoBoard):
+    def reset(self, size: int) -> None:
+        """
+        Creates a start state, an empty board with given size.
+        """
+        self.size: int = size
+        self.NS: int = size + 1
+        self.WE: int = 1
+        self.last_move: GO_POINT = NO_POINT
+        self.last2_move: GO_POINT = NO_POINT
+        self.current_player: GO_COLOR = BLACK
+        self.maxpoint: int = board_array_size(size)
+        self.on_board, self.shifts, self.capture_patterns, self.capture_neighbors, self.num_points = \
+            _size_tables(size)
+        # stone masks indexed by color, EMPTY and BORDER entries stay 0
+        self.masks: List[int] = [0, 0, 0, 0]
+        self.num_stones: int = 0
+        self._board_cache = None
+        self.black_captures = 0
+        self.white_captures = 0
+        self.depth = 0
+        self._history = None
+
+    def copy(self) -> 'BitBoard':
+        b = BitBoard.__new__(BitBoard)
+        b.size = self.size
+        b.NS = self.NS
+        b.WE = self.WE
+        b.last_move = self.last_move
+        b.last2_move = self.last2_move
+        b.current_player = self.current_player
+        b.maxpoint = self.maxpoint
+        b.on_board = self.on_board
+        b.shifts = self.shifts
+        b.capture_patterns = self.capture_patterns
+        b.capture_neighbors = self.capture_neighbors
+        b.num_points = self.num_points
+        b.masks = self.masks.copy()
+        b.num_stones = self.num_stones
+        b._board_cache = None
+        b.black_captures = self.black_captures
+        b.white_captures = self.white_captures
+        b.depth = self.depth
+        b._history = self._history
+        return b
+
+    def __getstate__(self) -> Dict:
+        """
+        Pickle support, used to send positions to worker processes.
+        The board slot of GoBoard is hidden by the board property,
+        so the state lists the attributes explicitly.
+        """
+        state = {name: getattr(self, name) for name in GoBoard.__slots__
+                 if name not in ("board", "_board_shared") and hasattr(self, name)}
+        state.update(self.__dict__)
+        state["_board_cache"] = None
+        return state
+
+    def __setstate__(self, state: Dict) -> None:
+        for name, value in state.items():
+            setattr(self, name, value)
+
+    @property
+    def board(self) -> np.ndarray:
+        """
+        The position in the padded 1D array format of GoBoard.
+        Built on demand and cached until the next move or undo.
+        Treat it as read-only: writes do not reach the bitmasks.
+        """
+        if self._board_cache is None:
+            self._board_cache = self._to_array()
+        return self._board_cache
+
+    def _bits(self, mask: int) -> np.ndarray:
+        """ Unpack mask into a boolean array of length maxpoint """
+        nbytes = (self.maxpoint + 7) // 8
+        raw = np.frombuffer(mask.to_bytes(nbytes, "little"), dtype=np.uint8)
+        return np.unpackbits(raw, bitorder="little")[: self.maxpoint].view(bool)
+
+    def _to_array(self) -> np.ndarray:
+        board_array = np.full(self.maxpoint, BORDER, dtype=GO_POINT)
+        board_array[self._bits(self.on_board)] = EMPTY
+        board_array[self._bits(self.masks[BLACK])] = BLACK
+        board_array[self._bits(self.masks[WHITE])] = WHITE
+        return board_array
+
+    def get_color(self, point: GO_POINT) -> GO_COLOR:
+        point = int(point)
+        if point < 0:
+            return BORDER
+        bit = 1 << point
+        if self.masks[BLACK] & bit:
+            return BLACK
+        if self.masks[WHITE] & bit:
+            return WHITE
+        if self.on_board & bit:
+            return EMPTY
+        return BORDER
+
+    def is_legal(self, point: GO_POINT, color: GO_COLOR) -> bool:
+        if point == PASS:
+            return True
+        point = int(point)
+        return point >= 0 and (self.empty_mask() >> point) & 1 == 1
+
+    def end_of_game(self) -> bool:
+        return self.num_stones == self.num_points or (self.last_move == PASS and self.last2_move == PASS)
+
+    def empty_mask(self) -> int:
+        return self.on_board & ~(self.masks[BLACK] | self.masks[WHITE])
+
+    def get_empty_points(self) -> np.ndarray:
+        """
+        Return:
+            The empty points on the board
+        """
+        return np.flatnonzero(self._bits(self.empty_mask())).astype(GO_POINT)
+
+    def play_move(self, point: GO_POINT, color: GO_COLOR) -> bool:
+        """
+        Tries to play a move of color on the point.
+        Returns whether or not the point was empty.
+        """
+        point = int(point)
+        if point < 0:
+            return False
+        bit = 1 << point
+        if not self.on_board & bit or (self.masks[BLACK] | self.masks[WHITE]) & bit:
+            return False
+        O = opponent(color)
+        own = self.masks[color] | bit
+        opp = self.masks[O]
+        captured = []
+        if opp & self.capture_neighbors[point]:
+            for pair, end, p1, p2 in self.capture_patterns[point]:
+                if opp & pair == pair and own & end:
+                    opp ^= pair
+                    captured.append(p1)
+                    captured.append(p2)
+        self.masks[color] = own
+        self.masks[O] = opp
+        self.num_stones += 1 - len(captured)
+        if color == BLACK:
+            self.black_captures += len(captured)
+            self._history = (point, captured, [], self._history)
+        else:
+            self.white_captures += len(captured)
+            self._history = (point, [], captured, self._history)
+        self.current_player = O
+        self.last2_move = self.last_move
+        self.last_move = point
+        self.depth += 1
+        self._board_cache = None
+        return True
+
+    def undo(self):
+        move, bcs, wcs, self._history = self._history
+        bit = 1 << move
+        self.masks[BLACK] &= ~bit
+        self.masks[WHITE] &= ~bit
+        self.current_player = opponent(self.current_player)
+        self.depth -= 1
+        for point in bcs:
+            self.masks[WHITE] |= 1 << point
+            self.black_captures -= 1
+        for point in wcs:
+            self.masks[BLACK] |= 1 << point
+            self.white_captures -= 1
+        self.num_stones += len(bcs) + len(wcs) - 1
+        if self._history is not None:
+            self.last_move = self._history[0]
+            if self._history[3] is not None:
+                self.last2_move = self._history[3][0]
+        self._board_cache = None
+
+    def full_board_detect_five_in_a_row(self) -> GO_COLOR:
+        """
+        Returns BLACK or WHITE if any five in a row is detected for the color
+        EMPTY otherwise.
+        Checks the entire board.
+        """
+        for color in (BLACK, WHITE):
+            if has_five(self.masks[color], self.shifts):
+                return color
+        return EMPTY
+
+    def detect_five_in_a_row(self) -> GO_COLOR:
+        """
+        Returns BLACK or WHITE if any five in a row is detected for the color
+        EMPTY otherwise.
+        Only checks the color of the last move.
+        """
+        if self.last_move == NO_POINT or self.last_move == PASS:
+            return EMPTY
+        c = self.get_color(self.last_move)
+        if c != BLACK and c != WHITE:
+            return EMPTY
+        if has_five(self.masks[c], self.shifts):
+            return c
+        return EMPTY
+
+    def state_to_str(self):
+        return "{:x}/{:x}/{}/{}/{}".format(self.masks[BLACK], self.masks[WHITE],
+                                          self.current_player, self.black_captures,
+                                          self.white_captures)
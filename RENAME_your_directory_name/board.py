@@ -41,20 +41,28 @@ For many more utility functions, see the GoBoardUtil class in board_util.py.
 
 The board is stored as a one-dimensional array of GO_POINT in self.board.
 See coord_to_point for explanations of the array encoding.
+
+copy() is cheap so that MCTS can copy a board for every node:
+- the board array is shared between copies and only duplicated
+  by the first copy that writes to it (copy-on-write),
+- the move history is a persistent linked list, shared by all copies.
+  Each entry is a tuple (point, black_captured, white_captured, previous)
+  where the captured lists hold the stones removed by that move,
+  and previous is the entry of the move before, or None.
 """
 class GoBoard(object):
+    __slots__ = (
+        "size", "NS", "WE", "last_move", "last2_move", "current_player",
+        "maxpoint", "board", "_board_shared", "black_captures",
+        "white_captures", "depth", "_history",
+    )
+
     def __init__(self, size: int) -> None:
         """
         Creates a Go board of given size
         """
         assert 2 <= size <= MAXSIZE
         self.reset(size)
-        self.black_captures = 0
-        self.white_captures = 0
-        self.depth = 0
-        self.black_capture_history = []
-        self.white_capture_history = []
-        self.move_history = []
 
     def add_two_captures(self, color: GO_COLOR) -> None:
         if color == BLACK:
@@ -81,30 +89,53 @@ class GoBoard(object):
         self.maxpoint: int = board_array_size(size)
         self.board: np.ndarray[GO_POINT] = np.full(self.maxpoint, BORDER, dtype=GO_POINT)
         self._initialize_empty_points(self.board)
+        self._board_shared: bool = False
         self.black_captures = 0
         self.white_captures = 0
         self.depth = 0
-        self.black_capture_history = []
-        self.white_capture_history = []
-        self.move_history = []
+        self._history = None
 
     def copy(self) -> 'GoBoard':
-        b = GoBoard(self.size)
-        assert b.NS == self.NS
-        assert b.WE == self.WE
+        """
+        Returns a copy of the board in O(1), without running reset().
+        The copy shares the board array until one of the two writes to it.
+        """
+        b = GoBoard.__new__(GoBoard)
+        b.size = self.size
+        b.NS = self.NS
+        b.WE = self.WE
         b.last_move = self.last_move
         b.last2_move = self.last2_move
         b.current_player = self.current_player
-        assert b.maxpoint == self.maxpoint
-        b.board = np.copy(self.board)
+        b.maxpoint = self.maxpoint
+        b.board = self.board
+        b._board_shared = True
+        self._board_shared = True
         b.black_captures = self.black_captures
         b.white_captures = self.white_captures
         b.depth = self.depth
-        b.black_capture_history = self.black_capture_history.copy()
-        b.white_capture_history = self.white_capture_history.copy()
-        b.move_history = self.move_history.copy()
+        b._history = self._history
         return b
 
+    def _own_board(self) -> None:
+        """
+        Make self.board private to this GoBoard before writing to it.
+        """
+        if self._board_shared:
+            self.board = self.board.copy()
+            self._board_shared = False
+
+    @property
+    def move_history(self) -> List[GO_POINT]:
+        """ The points played so far, oldest first """
+        moves: List[GO_POINT] = []
+        entry = self._history
+        while entry is not None:
+            moves.append(entry[0])
+            entry = entry[3]
+        moves.reverse()
+        return moves
+
     def get_color(self, point: GO_POINT) -> GO_COLOR:
         return self.board[point]
 
@@ -157,6 +188,7 @@ class GoBoard(object):
         """
         if self.board[point] != EMPTY:
             return False
+        self._own_board()
         self.board[point] = color
         self.current_player = opponent(color)
         self.last2_move = self.last_move
@@ -178,27 +210,25 @@ class GoBoard(object):
                     wcs.append(point+offset)
                     wcs.append(point+(offset*2))
         self.depth += 1
-        self.black_capture_history.append(bcs)
-        self.white_capture_history.append(wcs)
-        self.move_history.append(point)
+        self._history = (point, bcs, wcs, self._history)
         return True
     
     def undo(self):
-        self.board[self.move_history.pop()] = EMPTY
+        point, bcs, wcs, self._history = self._history
+        self._own_board()
+        self.board[point] = EMPTY
         self.current_player = opponent(self.current_player)
         self.depth -= 1
-        bcs = self.black_capture_history.pop()
         for point in bcs:
             self.board[point] = WHITE
             self.black_captures -= 1
-        wcs = self.white_capture_history.pop()
         for point in wcs:
             self.board[point] = BLACK
             self.white_captures -= 1
-        if len(self.move_history) > 0:
-            self.last_move = self.move_history[-1]
-        if len(self.move_history) > 1:
-            self.last2_move = self.move_history[-2]
+        if self._history is not None:
+            self.last_move = self._history[0]
+            if self._history[3] is not None:
+                self.last2_move = self._history[3][0]
 
     def neighbors_of_color(self, point: GO_POINT, color: GO_COLOR) -> List:
         """ List of neighbors of point of given color """
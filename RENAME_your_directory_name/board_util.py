@@ -27,7 +27,7 @@ class GoBoardUtil(object):
         # TODO use generator instead.
         legal_moves: List[GO_POINT] = []
         # TODO use generator instead.
-        for move in moves:
+        for move in moves.tolist():
             if board.is_legal(move, color):
                 legal_moves.append(move)
         return legal_moves
@@ -73,7 +73,8 @@ class GtpConnection:
             "gogui-rules_board": self.gogui_rules_board_cmd,
             "gogui-analyze_commands": self.gogui_analyze_cmd,
             "timelimit": self.timelimit_cmd,
-            "solve": self.solve_cmd
+            "solve": self.solve_cmd,
+            "setoption": self.setoption_cmd
         }
 
         # argmap is used for argument checking
@@ -86,6 +87,7 @@ class GtpConnection:
             "genmove": (1, "Usage: genmove {w,b}"),
             "play": (2, "Usage: play {b,w} MOVE"),
             "legal_moves": (1, "Usage: legal_moves {w,b}"),
+            "setoption": (2, "Usage: setoption NAME VALUE"),
         }
 
     def write(self, data: str) -> None:
@@ -166,6 +168,7 @@ class GtpConnection:
         Reset the board to empty board of given size
         """
         self.board.reset(size)
+        self.engine.reset()
 
     def board2d(self) -> str:
         return str(GoBoardUtil.get_twoD_board(self.board))
@@ -324,6 +327,7 @@ class GtpConnection:
 
             if args[1].lower() == 'pass':
                 self.board.play_move(PASS, color_to_int(board_color))
+                self.engine.notify_move(self.board, PASS)
                 if len(args) > 2 and args[2] == 'print_move':
                     self.respond('pass')
                 else:
@@ -339,6 +343,7 @@ class GtpConnection:
                 self.respond('illegal move: "{} {}" occupied'.format(board_color, board_move))
                 return
             else:
+                self.engine.notify_move(self.board, move)
                 # self.board.try_captures(coord, color)
                 self.debug_msg(
                     "Move: {}\nBoard:\n{}\n".format(board_move, self.board2d())
@@ -378,6 +383,15 @@ class GtpConnection:
         else:
             self.respond(winner + " " + winning_move)
 
+    def setoption_cmd(self, args: List[str]) -> None:
+        """ Set engine option args[0] to value args[1] """
+        try:
+            self.engine.set_option(args[0], args[1])
+        except ValueError as e:
+            self.error(str(e))
+            return
+        self.respond()
+
 def point_to_coord(point: GO_POINT, boardsize: int) -> Tuple[int, int]:
     """
     Transform point given as board array index 
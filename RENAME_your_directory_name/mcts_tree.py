@@ -0,0 +1,171 @@
+"""
+mcts_tree.py
+Array-backed search tree for MCTSPlayer.
+
+The tree is stored as a struct of numpy arrays indexed by node id,
+instead of one Python object per node. The children of a node are
+allocated together, so they occupy the contiguous id range
+first_child[n] .. first_child[n] + num_children[n] - 1.
+Nodes store only the move that leads to them; boards are rebuilt by
+replaying moves from the root board while descending the tree.
+"""
+
+import math
+import numpy as np
+from typing import List, Tuple
+
+from board_base import NO_POINT, GO_POINT
+
+"""
+Number of nodes added whenever the arrays are full
+"""
+CHUNK_SIZE = 4096
+
+"""
+Node id of the root
+"""
+ROOT = 0
+
+
+class SearchTree(object):
+    def __init__(self, capacity: int = CHUNK_SIZE) -> None:
+        """
+        Creates a tree with only the root node.
+        wins[n] counts the simulation results from the point of view of
+        the player who made move[n]: 1 for a win, 0.5 for a draw.
+        """
+        self.capacity: int = capacity
+        self.visits: np.ndarray = np.zeros(capacity, dtype=np.float64)
+        self.wins: np.ndarray = np.zeros(capacity, dtype=np.float64)
+        self.move: np.ndarray = np.full(capacity, NO_POINT, dtype=np.int32)
+        self.parent: np.ndarray = np.full(capacity, -1, dtype=np.int32)
+        self.first_child: np.ndarray = np.full(capacity, -1, dtype=np.int32)
+        self.num_children: np.ndarray = np.zeros(capacity, dtype=np.int32)
+        self.size: int = 1
+
+    def _grow(self, needed: int) -> None:
+        """
+        Make room for at least needed nodes, in steps of CHUNK_SIZE.
+        """
+        if needed <= self.capacity:
+            return
+        capacity = self.capacity
+        while capacity < needed:
+            capacity += CHUNK_SIZE
+        extra = capacity - self.capacity
+        self.visits = np.concatenate([self.visits, np.zeros(extra, dtype=np.float64)])
+        self.wins = np.concatenate([self.wins, np.zeros(extra, dtype=np.float64)])
+        self.move = np.concatenate([self.move, np.full(extra, NO_POINT, dtype=np.int32)])
+        self.parent = np.concatenate([self.parent, np.full(extra, -1, dtype=np.int32)])
+        self.first_child = np.concatenate([self.first_child, np.full(extra, -1, dtype=np.int32)])
+        self.num_children = np.concatenate([self.num_children, np.zeros(extra, dtype=np.int32)])
+        self.capacity = capacity
+
+    def is_leaf(self, node: int) -> bool:
+        return self.num_children[node] == 0
+
+    def children(self, node: int) -> range:
+        start = int(self.first_child[node])
+        return range(start, start + int(self.num_children[node]))
+
+    def expand(self, node: int, moves: List[GO_POINT]) -> None:
+        """
+        Add one child of node for each move, as a contiguous block.
+        """
+        n = len(moves)
+        if n == 0:
+            return
+        start = self.size
+        self._grow(start + n)
+        self.move[start:start + n] = moves
+        self.parent[start:start + n] = node
+        self.first_child[node] = start
+        self.num_children[node] = n
+        self.size += n
+
+    def select_child(self, node: int) -> int:
+        """
+        Returns the child of node with the largest UCB value,
+        computed over the whole child block at once.
+        Unvisited children have an infinite value, so they are tried first.
+        """
+        start = int(self.first_child[node])
+        end = start + int(self.num_children[node])
+        visits = self.visits[start:end]
+        log_total_visits = math.log(max(1.0, self.visits[node]))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ucb = self.wins[start:end] / visits + np.sqrt(2 * log_total_visits / visits)
+        ucb[visits == 0] = np.inf
+        return start + int(np.argmax(ucb))
+
+    def update(self, node: int, result: float) -> None:
+        """
+        Add one simulation with the given result to node.
+        """
+        self.visits[node] += 1
+        self.wins[node] += result
+
+    def best_child(self, node: int) -> int:
+        """
+        Returns the most visited child of node, or -1 if it has none.
+        """
+        if self.num_children[node] == 0:
+            return -1
+        start = int(self.first_child[node])
+        end = start + int(self.num_children[node])
+        return start + int(np.argmax(self.visits[start:end]))
+
+    def child_statistics(self, node: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Returns copies of the (move, visits, wins) arrays of the children of node.
+        """
+        start = max(0, int(self.first_child[node]))
+        end = start + int(self.num_children[node])
+        return (self.move[start:end].copy(), self.visits[start:end].copy(),
+                self.wins[start:end].copy())
+
+    def find_child(self, node: int, move: GO_POINT) -> int:
+        """
+        Returns the child of node reached by move, or -1 if there is none.
+        """
+        for child in self.children(node):
+            if self.move[child] == move:
+                return child
+        return -1
+
+    def subtree(self, node: int) -> 'SearchTree':
+        """
+        Returns a new tree holding a copy of the subtree below node,
+        with node as its root. Nodes are copied breadth first, so
+        child blocks stay contiguous and the arrays are compacted.
+        """
+        tree = SearchTree(max(CHUNK_SIZE, self.size - node))
+        tree.visits[ROOT] = self.visits[node]
+        tree.wins[ROOT] = self.wins[node]
+        queue = [(node, ROOT)]
+        for old, new in queue:
+            n = int(self.num_children[old])
+            if n == 0:
+                continue
+            start = int(self.first_child[old])
+            new_start = tree.size
+            tree._grow(new_start + n)
+            tree.visits[new_start:new_start + n] = self.visits[start:start + n]
+            tree.wins[new_start:new_start + n] = self.wins[start:start + n]
+            tree.move[new_start:new_start + n] = self.move[start:start + n]
+            tree.parent[new_start:new_start + n] = new
+            tree.first_child[new] = new_start
+            tree.num_children[new] = n
+            tree.size += n
+            queue.extend(zip(range(start, start + n), range(new_start, new_start + n)))
+        return tree
+
+    def tree_to_string(self, node: int = ROOT, indent: int = 0) -> str:
+        """
+        Output the tree structure as a string (for debugging)
+        """
+        s = "\n" + "| " * indent + "move {} visits {} wins {}".format(
+            self.move[node], int(self.visits[node]), self.wins[node])
+        for child in self.children(node):
+            s += self.tree_to_string(child, indent + 1)
+        return s
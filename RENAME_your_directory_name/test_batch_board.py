@@ -0,0 +1,126 @@
+"""
+test_batch_board.py
+Tests that BatchBoard plays by the rules of GoBoard.
+Run from this directory with: python -m unittest test_batch_board
+"""
+
+import random
+import unittest
+
+import numpy as np
+
+from board_base import BLACK, WHITE, EMPTY, NO_POINT, PASS, coord_to_point
+from board import GoBoard
+from batch_board import BatchBoard
+from capture_search import capture_win
+
+
+def random_boards(rng, size, num_games, max_moves):
+    boards = []
+    for _ in range(num_games):
+        board = GoBoard(size)
+        for _ in range(rng.randrange(max_moves)):
+            if board.is_terminal()[0]:
+                break
+            board.play_move(rng.choice(board.get_empty_points().tolist()), board.current_player)
+        boards.append(board)
+    return boards
+
+
+class BatchBoardTest(unittest.TestCase):
+    def assertSameGames(self, boards, batch):
+        terminal, winner = batch.is_terminal()
+        for i, board in enumerate(boards):
+            self.assertTrue(np.array_equal(batch.board[i], board.board))
+            self.assertEqual(batch.current_player[i], board.current_player)
+            self.assertEqual(batch.captures[i, BLACK], board.black_captures)
+            self.assertEqual(batch.captures[i, WHITE], board.white_captures)
+            self.assertEqual((terminal[i], winner[i]), board.is_terminal())
+
+    def test_capture(self):
+        batch = BatchBoard(7, 2)
+        for row, col, color in [(1, 1, BLACK), (1, 2, WHITE), (1, 3, WHITE)]:
+            batch.play_moves([coord_to_point(row, col, 7)] * 2, [color] * 2)
+        # only game 0 completes the XOOX pattern
+        batch.play_moves([coord_to_point(1, 4, 7), coord_to_point(2, 4, 7)], [BLACK, BLACK])
+        self.assertEqual(batch.captures[:, BLACK].tolist(), [2, 0])
+        self.assertEqual(batch.board[0, coord_to_point(1, 2, 7)], EMPTY)
+        self.assertEqual(batch.board[1, coord_to_point(1, 2, 7)], WHITE)
+        batch.undo()
+        self.assertEqual(batch.captures[:, BLACK].tolist(), [0, 0])
+        self.assertEqual(batch.board[0, coord_to_point(1, 2, 7)], WHITE)
+
+    def test_random_games_match_goboard(self):
+        rng = random.Random(1)
+        for size in (5, 7, 9):
+            boards = [GoBoard(size) for _ in range(20)]
+            batch = BatchBoard(size, len(boards))
+            history = []
+            while not all(board.is_terminal()[0] for board in boards):
+                if history and rng.random() < 0.2:
+                    for board, move in zip(boards, history.pop()):
+                        if move != PASS:
+                            board.undo()
+                    batch.undo()
+                else:
+                    moves = [PASS if board.is_terminal()[0]
+                             else rng.choice(board.get_empty_points().tolist()) for board in boards]
+                    for board, move in zip(boards, moves):
+                        if move != PASS:
+                            board.play_move(move, board.current_player)
+                    batch.play_moves(np.array(moves))
+                    history.append(moves)
+                self.assertSameGames(boards, batch)
+
+    def test_from_board(self):
+        boards = random_boards(random.Random(2), 7, 10, 30)
+        for board in boards:
+            self.assertSameGames([board], BatchBoard.from_board(board, 1))
+
+    def test_winning_moves(self):
+        boards = random_boards(random.Random(3), 7, 200, 40)
+        for board in boards:
+            if board.is_terminal()[0]:
+                continue
+            move = BatchBoard.from_board(board, 1).winning_moves()[0]
+            color = board.current_player
+            wins = []
+            for point in board.get_empty_points().tolist():
+                board.play_move(point, color)
+                if board.detect_five_in_a_row() == color:
+                    wins.append(point)
+                board.undo()
+            if wins:
+                self.assertIn(move, wins)
+            else:
+                self.assertEqual(move, NO_POINT)
+
+    def test_capture_wins(self):
+        boards = random_boards(random.Random(4), 7, 200, 40)
+        for board in boards:
+            if board.is_terminal()[0]:
+                continue
+            color = board.current_player
+            if color == BLACK:
+                board.black_captures = 8
+            else:
+                board.white_captures = 8
+            move = BatchBoard.from_board(board, 1).capture_wins()[0]
+            if capture_win(board, color) == NO_POINT:
+                self.assertEqual(move, NO_POINT)
+            else:
+                board.play_move(move, color)
+                self.assertEqual(board.is_terminal(), (True, color))
+
+    def test_play_random_games(self):
+        boards = random_boards(random.Random(4), 7, 10, 20)
+        for board in boards:
+            batch = BatchBoard.from_board(board, 8)
+            winners = batch.play_random_games(np.random.default_rng(5))
+            terminal, winner = batch.is_terminal()
+            self.assertTrue(terminal.all())
+            self.assertTrue(np.array_equal(winners, winner))
+
+
+if __name__ == "__main__":
+    unittest.main()
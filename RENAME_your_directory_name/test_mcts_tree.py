@@ -0,0 +1,72 @@
+"""
+test_mcts_tree.py
+Tests for the array based SearchTree.
+Run from this directory with: python -m unittest test_mcts_tree
+"""
+
+import random
+import unittest
+
+from mcts_tree import SearchTree, ROOT
+
+
+def random_tree(rng, num_simulations):
+    """
+    Grow a tree by expanding random leaves and backing up random results.
+    """
+    tree = SearchTree(16)
+    for _ in range(num_simulations):
+        node = ROOT
+        path = [node]
+        while not tree.is_leaf(node):
+            node = rng.choice(tree.children(node))
+            path.append(node)
+        if len(path) < 6:
+            tree.expand(node, rng.sample(range(100), rng.randint(1, 5)))
+        result = rng.choice((0.0, 0.5, 1.0))
+        for node in path:
+            tree.update(node, result)
+    return tree
+
+
+def subtree_stats(tree, node):
+    """
+    Nested (move, visits, wins) of the children below node, in order.
+    """
+    return [(int(tree.move[child]), int(tree.visits[child]), float(tree.wins[child]),
+             subtree_stats(tree, child))
+            for child in tree.children(node)]
+
+
+class SearchTreeTest(unittest.TestCase):
+    def test_subtree_keeps_statistics(self):
+        rng = random.Random(1)
+        tree = random_tree(rng, 500)
+        for child in tree.children(ROOT):
+            sub = tree.subtree(child)
+            self.assertEqual(sub.visits[ROOT], tree.visits[child])
+            self.assertEqual(sub.wins[ROOT], tree.wins[child])
+            self.assertEqual(subtree_stats(sub, ROOT), subtree_stats(tree, child))
+
+    def test_subtree_is_compact(self):
+        rng = random.Random(2)
+        tree = random_tree(rng, 500)
+        child = max(tree.children(ROOT), key=lambda c: tree.visits[c])
+        sub = tree.subtree(child)
+        def count(t, node):
+            return 1 + sum(count(t, c) for c in t.children(node))
+        self.assertEqual(sub.size, count(sub, ROOT))
+        self.assertEqual(sub.size, count(tree, child))
+        for node in range(1, sub.size):
+            self.assertIn(node, sub.children(int(sub.parent[node])))
+
+    def test_find_child(self):
+        tree = SearchTree()
+        tree.expand(ROOT, [12, 7, 30])
+        for child in tree.children(ROOT):
+            self.assertEqual(tree.find_child(ROOT, int(tree.move[child])), child)
+        self.assertLess(tree.find_child(ROOT, 8), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
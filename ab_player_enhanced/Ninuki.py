@@ -9,32 +9,109 @@ Written by Cmput 455 TA and Martin Mueller
 from gtp_connection import GtpConnection, format_point, point_to_coord
 from board_base import DEFAULT_SIZE, GO_POINT, GO_COLOR
 from board import GoBoard
+from bitboard import BitBoard
 from board_util import GoBoardUtil
 from engine import GoEngine
+from transposition import TranspositionTable, EXACT, LOWER, UPPER
+from time_manager import TimeManager
+from threat_search import find_forced_win
+from capture_search import find_capture_win, RACE_CAPTURES
+from dfpn import DfpnSolver, ProofTable, INF
+from move_picker import MovePicker
+from deadline import Deadline
+import sys
 import time
 import random
+import atexit
+import multiprocessing
 from board_base import (
     BLACK,
     WHITE,
-    EMPTY,
-    BORDER,
     GO_COLOR, GO_POINT,
     PASS,
+    NO_POINT,
     MAXSIZE,
-    coord_to_point,
+    board_array_size,
     opponent
 )
 
+"""
+Seconds of the time limit kept free in a parallel search
+for collecting the worker results
+"""
+POOL_MARGIN = 0.05
+
+"""
+Share of the time budget that the threat and capture searches may use
+before the alpha-beta search starts
+"""
+THREAT_SHARE = 0.2
+
+"""
+Maximum number of plies of the quiescence search beyond the depth limit
+"""
+QUIESCENCE_DEPTH = 8
+
+"""
+Solvers of the solve command, chosen with the solver option
+"""
+SOLVERS = ("alphabeta", "dfpn")
+
+"""
+Score of a won position for the player to move, and minus the score
+of a lost one. Heuristic scores stay strictly between the two, so only
+wins, losses and draws (0) are proven values.
+"""
+WIN_SCORE = 10000
+
+"""
+Heuristic score of one unit of the heuristic value, e.g. of 10 captures
+"""
+EVAL_SCALE = 1000
+
+"""
+Default half width of the aspiration window around the score of the
+previous iteration, and the factor by which the window widens after
+the result falls outside it
+"""
+ASPIRATION_WINDOW = 150
+ASPIRATION_GROWTH = 4
+
+"""
+Late move reductions: from this remaining depth on, quiet moves after
+the first LMR_MOVES moves of a node are searched LMR_REDUCTION plies
+less deep first. Reducing by two plies keeps the player to move at the
+depth limit, so the reduced search does not suffer from the odd-even
+swings of heuristic_eval.
+"""
+LMR_MIN_DRAFT = 3
+LMR_MOVES = 3
+LMR_REDUCTION = 2
+
+"""
+Futility pruning: a quiet move one ply above the depth limit is skipped
+if the static score plus this margin does not exceed alpha. A quiet
+move changes only the threat part of heuristic_eval, which lies within
+0.15 * EVAL_SCALE of 0, so it raises the score by less than the margin.
+"""
+FUTILITY_MARGIN = 300
+
 
 def heuristic_eval(board):
         """
-        Returns: a very basic heuristic value of the board
-        Currently only considers captures
+        Returns: a basic heuristic score of the board for the player to move.
+        Considers captures, plus the four- and three-stone windows of
+        each color from board.threat_summary.
+        Non-terminal scores are integers strictly between -WIN_SCORE and WIN_SCORE.
         """
         if board.current_player == BLACK:
-            return (board.black_captures - board.white_captures) / 10
+            value = (board.black_captures - board.white_captures) / 10
         else:
-            return (board.white_captures - board.black_captures) / 10
+            value = (board.white_captures - board.black_captures) / 10
+        _, own_fours, own_threes = board.threat_summary(board.current_player)
+        _, opp_fours, opp_threes = board.threat_summary(opponent(board.current_player))
+        threats = 3 * (own_fours - opp_fours) + (own_threes - opp_threes)
+        return round(EVAL_SCALE * (value + 0.15 * threats / (1 + abs(threats))))
 
 def heuristic_eval_move(board, move):
         """
@@ -69,51 +146,203 @@ class ABPlayer(GoEngine):
         """
         GoEngine.__init__(self, "Go0", 1.0)
         self.time_limit = 1
+        self.time_manager = TimeManager(self.time_limit)
+        self.budget = self.time_limit
+        self.options["tt_mb"] = 16.0
+        self.options["workers"] = 1
+        # move generation radius around the stones for genmove, 0 for all moves
+        self.options["candidate_distance"] = 2
+        self.candidate_distance = 0
+        # killer moves and history table, see reset_ordering
+        self.options["move_ordering"] = True
+        self.reset_ordering(board_array_size(MAXSIZE))
+        # forced win search by fours, and threes up to threat_threes, see threat_win
+        self.options["threat_search"] = True
+        self.options["threat_threes"] = 1
+        self.threat_nodes = 0
+        # capture race search when close to 10 captures, see threat_win
+        self.options["capture_search"] = True
+        self.capture_nodes = 0
+        # solver of the solve command, and the df-pn table size
+        self.options["solver"] = "alphabeta"
+        self.options["dfpn_mb"] = 16.0
+        self.proof_table = ProofTable(self.options["dfpn_mb"])
+        # (attacker, pn, dn, nodes) of the df-pn searches of the last solve
+        self.dfpn_results = []
+        # search captures and forced blocks past the depth limit, see quiescence
+        self.options["quiescence"] = True
+        # null-window search of the moves after the first, see alpha_beta
+        self.options["pvs"] = True
+        # aspiration window half width, 0 for a full window, see aspiration_search
+        self.options["aspiration"] = ASPIRATION_WINDOW
+        # late move reductions and futility pruning, only in genmove searches
+        self.options["lmr"] = True
+        self.options["futility"] = True
+        self.selective = False
+        # search counters, see reset_stats
+        self.reset_stats()
+        # best move of the last completed iteration, searched first at the root
+        self.pv_move = NO_POINT
+        # seconds of the time budget spent in total and on discarded iterations
+        self.budget_total = 0.0
+        self.wasted_total = 0.0
+        self.tt = TranspositionTable(self.options["tt_mb"])
+        # parallel search state, see start_workers
+        self.pool = None
+        self.stop = None
+        atexit.register(self.stop_workers)
 
     def get_move(self, board: GoBoard, color: GO_COLOR) -> GO_POINT:
-        if board.get_empty_points().size == 0:
+        if board.num_empty == 0:
             return "pass"
         if color == 'w':
             board.current_player = WHITE
         else:
             board.current_player = BLACK
-        winner, move = self.solve_board(board)
+        winner, move = self.solve_board(board, exact=False)
         return format_point(point_to_coord(self.best_move, self.board.size)).lower()
 
+    def reset(self):
+        """
+        Clear the transposition table and the move ordering tables for
+        a new game. The hash keys do not depend on the board size, so
+        entries of another size would match wrong positions.
+        """
+        self.tt.clear()
+        self.reset_ordering(board_array_size(MAXSIZE))
+
+    def reset_stats(self):
+        """
+        Clear the counters of the last search reported by search_stats:
+            nodes, iteration_nodes: nodes searched in total and per iteration
+            pvs_researches, aspiration_researches: re-searches after
+                a null window or aspiration window fail
+            lmr_reductions, lmr_researches, futility_prunes: reduced moves,
+                their full depth re-searches and pruned moves
+        """
+        self.nodes = 0
+        self.iteration_nodes = []
+        self.pvs_researches = 0
+        self.aspiration_researches = 0
+        self.lmr_reductions = 0
+        self.lmr_researches = 0
+        self.futility_prunes = 0
+        self.partial_used = False
+
+    def reset_ordering(self, maxpoint):
+        """
+        Clear the move ordering tables:
+            killers[ply]:          the last two moves that caused a cutoff at ply
+            history[color][point]: sum of draft * draft over the cutoffs by
+                                   color playing point
+        Both are kept across the iterations of one search.
+        """
+        self.killers = []
+        self.history = [[0] * maxpoint for _ in range(3)]
+
+    def record_cutoff(self, move, depth, draft):
+        while len(self.killers) <= depth:
+            self.killers.append([])
+        killers = self.killers[depth]
+        if move not in killers:
+            killers.insert(0, move)
+            del killers[2:]
+        self.history[self.board.current_player][move] += draft * draft
+
     def alpha_beta(self, alpha, beta, depth):
-        if time.time() - self.solve_start_time > (self.time_limit - 0.01):
+        self.nodes += 1
+        if self.nodes >= self.deadline.next_poll and self.deadline.poll(self.nodes):
             return 0, False, True
 
         is_terminal, winner = self.board.is_terminal()
         if is_terminal:
             if winner == self.board.current_player:
-                return float('inf'), True, False
+                return WIN_SCORE, True, False
             elif winner == opponent(self.board.current_player):
-                return float('-inf'), True, False
+                return -WIN_SCORE, True, False
             else:
                 return 0, True, False
 
         if depth >= self.max_depth:
-            state = self.board.copy()
-            return heuristic_eval(state), False, False  # Evaluate the position using your heuristic
+            if self.options["quiescence"]:
+                return self.quiescence(alpha, beta, depth)
+            return heuristic_eval(self.board), False, False
 
-        any_unsolved = False
-        moves = []
-        # Check for moves that result in a five-in-a-row
-        priority_moves = self.board.moves_for_n_in_a_row(self.board.current_player, GoBoardUtil.get_twoD_board(self.board), 4)
-        if priority_moves:
-            moves = priority_moves
-        else:
-            # If no priority moves, use the standard legal moves
-            moves = GoBoardUtil.generate_legal_moves(self.board, self.board.current_player)
-        if depth == 0:
-            random.shuffle(moves)
+        # Probe the transposition table. Solved entries are valid at any depth,
+        # others only if they were searched at least as deep as needed here.
+        # At the root the stored move is only used for ordering, so that best_move is set.
+        key = self.board.hash
+        draft = self.max_depth - depth
+        alpha_orig = alpha
+        tt_move = NO_POINT
+        entry = self.tt.probe(key)
+        if entry is not None:
+            tt_depth, bound, tt_value, tt_move, tt_solved = entry
+            if depth > 0 and (tt_solved or tt_depth >= draft):
+                if bound == EXACT \
+                        or (bound == LOWER and tt_value >= beta) \
+                        or (bound == UPPER and tt_value <= alpha):
+                    return tt_value, tt_solved, False
 
+        any_unsolved = False
+        # Moves are generated stage by stage as the search reaches them, see MovePicker.
+        # At the root, the best move of the previous iteration goes first
+        # and the other moves are shuffled, so that parallel searches differ.
+        ordering = self.options["move_ordering"]
+        picker = MovePicker(
+            self.board,
+            [self.pv_move, tt_move] if depth == 0 else [tt_move],
+            self.killers[depth] if ordering and depth < len(self.killers) else [],
+            self.history[self.board.current_player] if ordering else None,
+            self.candidate_distance,
+            depth == 0)
 
-        for move in moves:
+        # Principal variation search: the first move gets the full window.
+        # The others are searched with a null window, which only tells
+        # whether the move beats alpha, and again with the full window if it does.
+        # In a selective search, quiet moves that do not make a four are
+        # skipped next to the depth limit if the static score is too far
+        # below alpha, and reduced if ordered late.
+        best_move = NO_POINT
+        scout = False
+        searched = 0
+        selective = self.selective and depth > 0
+        fours = None
+        static_score = None
+        for move in picker:
+            reduction = 0
+            if selective and picker.quiet:
+                if fours is None:
+                    fours = self.board.threat_points(self.board.current_player, 3)
+                if move not in fours:
+                    if draft == 1 and self.options["futility"]:
+                        if static_score is None:
+                            static_score = heuristic_eval(self.board)
+                        if static_score + FUTILITY_MARGIN <= alpha:
+                            self.futility_prunes += 1
+                            any_unsolved = True
+                            continue
+                    elif draft >= LMR_MIN_DRAFT and searched >= LMR_MOVES and self.options["lmr"]:
+                        reduction = LMR_REDUCTION
             self.board.play_move(move, self.board.current_player)
-            
-            value, solved, timeout = self.alpha_beta(-beta, -alpha, depth+1)
+            searched += 1
+
+            if scout or reduction:
+                self.max_depth -= reduction
+                value, solved, timeout = self.alpha_beta(-alpha - 1, -alpha, depth+1)
+                self.max_depth += reduction
+                if reduction:
+                    self.lmr_reductions += 1
+                    if not timeout and -value > alpha:
+                        # verify at full depth before the move may raise alpha
+                        self.lmr_researches += 1
+                        value, solved, timeout = self.alpha_beta(-alpha - 1, -alpha, depth+1)
+                if not timeout and alpha < -value < beta:
+                    self.pvs_researches += 1
+                    value, solved, timeout = self.alpha_beta(-beta, -alpha, depth+1)
+            else:
+                value, solved, timeout = self.alpha_beta(-beta, -alpha, depth+1)
+                scout = self.options["pvs"]
             # The following evaluation function is commented out because it was not performing as expected
             #TODO: Improve heuristic_eval_move function
             # value = heuristic_eval_move(self.board, move)
@@ -125,45 +354,294 @@ class ABPlayer(GoEngine):
             
             if not solved:
                 any_unsolved = True
+            if depth == 0 and move == self.pv_move:
+                self.pv_searched = True
 
             if value > alpha:
                 alpha = value
+                best_move = move
                 if depth == 0:
-                    self.best_move = move
+                    self.iteration_best = move
 
-            if solved and value == float('inf'):
-                return float('inf'), True, False
+            if solved and value >= WIN_SCORE:
+                if self.options["move_ordering"]:
+                    self.record_cutoff(move, depth, draft)
+                self.tt.store(key, draft, EXACT, WIN_SCORE, move, True)
+                return WIN_SCORE, True, False
 
             if value >= beta:
-                return beta, True, False
-        
+                if self.options["move_ordering"]:
+                    self.record_cutoff(move, depth, draft)
+                # a cutoff is only a proven bound if the refuting move was solved
+                self.tt.store(key, draft, LOWER, beta, move, solved)
+                return beta, solved, False
+
+        # moves far from all stones are not searched, so only wins are proofs
+        any_unsolved = any_unsolved or not picker.complete
+        bound = EXACT if alpha > alpha_orig else UPPER
+        self.tt.store(key, draft, bound, alpha, best_move, not any_unsolved)
         return alpha, not any_unsolved, False
 
 
-    def solve_board(self, board):
-        self.solve_start_time = time.time()
+    def quiescence(self, alpha, beta, depth):
+        """
+        Search the tactical moves of a position at or past the depth limit
+        until it is quiet: completing five, blocking a four, captures and
+        defenses against captures. The player to move may stand pat on
+        the heuristic value instead, unless a four has to be blocked.
+        Returns (value, solved, timeout) like alpha_beta.
+        """
+        board = self.board
+        color = board.current_player
+        if board.completion_points(color):
+            return WIN_SCORE, True, False
+        if depth - self.max_depth >= QUIESCENCE_DEPTH:
+            return heuristic_eval(board), False, False
+        blocks = board.completion_points(opponent(color))
+        captures = board.capture_points(color)
+        if blocks:
+            # every other move loses, so the moves are complete
+            moves = blocks + [move for move in captures if move not in blocks]
+            any_unsolved = False
+        else:
+            stand_pat = heuristic_eval(board)
+            if stand_pat >= beta:
+                return beta, False, False
+            alpha = max(alpha, stand_pat)
+            defenses = board.capture_points(opponent(color))
+            moves = captures + [move for move in defenses if move not in captures]
+            any_unsolved = True
+
+        for move in moves:
+            board.play_move(move, color)
+            value, solved, timeout = self.alpha_beta(-beta, -alpha, depth + 1)
+            board.undo()
+            value = -value
+            if timeout:
+                return 0, False, True
+            if not solved:
+                any_unsolved = True
+            if solved and value >= WIN_SCORE:
+                return WIN_SCORE, True, False
+            if value >= beta:
+                return beta, solved, False
+            alpha = max(alpha, value)
+        return alpha, not any_unsolved, False
+
+    def iterative_deepening(self, board, start_depth=1, candidate_distance=0, budget=None, selective=False):
+        """
+        Search board with increasing depth until it is solved or time is up.
+        With candidate_distance > 0 only the moves within that distance
+        of a stone are searched, see GoBoardUtil.generate_candidate_moves.
+        With a budget in seconds, no iteration is started that the time
+        manager expects to end after the budget.
+        selective=True allows the late move reductions and futility
+        pruning of the lmr and futility options.
+        Returns (depth, result, solved, best move) of the deepest
+        completed iteration, or None if no iteration completed.
+        """
         self.board = board.copy()
-        self.tt = {}
-        if self.board.get_empty_points().size == 0:
+        self.candidate_distance = candidate_distance
+        self.selective = selective
+        if candidate_distance > 0:
+            self.board.set_candidate_distance(candidate_distance)
+        if self.board.num_empty == 0:
             self.best_move = PASS
         else:
-            self.best_move = self.board.get_empty_points()[0]
+            self.best_move = self.board.get_empty_point_list()[0]
 
+        self.reset_ordering(self.board.maxpoint)
+        self.reset_stats()
+        self.pv_move = NO_POINT
+        self.time_manager.start_search()
+        completed = None
         solved = False
         timeout = False
-        self.max_depth = 1
+        self.max_depth = start_depth
         while not solved and not timeout:
-            result, solved, timeout = self.alpha_beta(-1, 1, 0)
+            nodes = self.nodes
+            start_time = time.time()
+            self.iteration_best = None
+            self.pv_searched = False
+            result, solved, timeout = self.aspiration_search(
+                None if completed is None else completed[1])
+            self.iteration_nodes.append(
+                (self.max_depth, self.nodes - nodes, not timeout, time.time() - start_time))
+            if not timeout:
+                if self.iteration_best is not None:
+                    self.best_move = self.iteration_best
+                self.pv_move = self.best_move
+                completed = (self.max_depth, result, solved, self.best_move)
+                self.time_manager.record_iteration(*self.iteration_nodes[-1][1:4:2])
+                if budget is not None and not solved and not self.time_manager.next_iteration_fits(
+                        time.time() - self.solve_start_time, budget):
+                    break
+            elif self.iteration_best is not None \
+                    and (self.pv_searched or self.pv_move == NO_POINT):
+                # The interrupted iteration finished the previous best move first,
+                # so its best move is at least as well searched: keep it
+                self.best_move = self.iteration_best
+                self.partial_used = True
             self.max_depth += 1
-        
-        if timeout:
+
+        self.budget_total += time.time() - self.solve_start_time
+        if timeout and not self.partial_used:
+            self.wasted_total += self.iteration_nodes[-1][3]
+        return completed
+
+    def aspiration_search(self, previous):
+        """
+        Search the root to max_depth with a window of the aspiration
+        option around previous, the score of the last iteration, or with
+        the full window if previous is None. A result at the edge of the
+        window is only a bound, so then the window widens on that side
+        and the root is searched again.
+        Returns (value, solved, timeout) like alpha_beta.
+        """
+        delta = self.options["aspiration"]
+        if previous is None or delta <= 0 or abs(previous) >= WIN_SCORE:
+            return self.alpha_beta(-WIN_SCORE, WIN_SCORE, 0)
+        alpha = max(-WIN_SCORE, previous - delta)
+        beta = min(WIN_SCORE, previous + delta)
+        while True:
+            result, solved, timeout = self.alpha_beta(alpha, beta, 0)
+            if timeout:
+                return result, solved, timeout
+            if result <= alpha and alpha > -WIN_SCORE:
+                delta *= ASPIRATION_GROWTH
+                alpha = max(-WIN_SCORE, previous - delta)
+            elif result >= beta and beta < WIN_SCORE:
+                delta *= ASPIRATION_GROWTH
+                beta = min(WIN_SCORE, previous + delta)
+                # the move that failed high goes first in the next search
+                self.pv_move = self.iteration_best
+            else:
+                return result, solved, timeout
+            self.aspiration_researches += 1
+
+    def threat_win(self, board, end_time):
+        """
+        Look for a forced win of the player to move with the threat search,
+        then with the capture race search, until end_time.
+        Returns the winning move or NO_POINT.
+        """
+        self.threat_nodes = 0
+        self.capture_nodes = 0
+        move = NO_POINT
+        if self.options["threat_search"]:
+            move, self.threat_nodes = find_forced_win(
+                board, Deadline(end_time), self.options["threat_threes"])
+        if move == NO_POINT and self.options["capture_search"] \
+                and board.get_captures(board.current_player) >= RACE_CAPTURES:
+            move, self.capture_nodes = find_capture_win(board, Deadline(end_time))
+        return move
+
+    def search_stats(self):
+        """
+        Returns the statistics of the last search: the nodes of the threat
+        and capture searches, then one line per iteration: depth, nodes,
+        effective branching factor nodes ** (1 / depth), seconds and
+        whether the iteration completed, where the nodes include aspiration
+        re-searches. Then the totals, the number of re-searches after
+        a null window or aspiration window fail, the reduced moves, their
+        re-searches and the pruned moves, the time spent on an
+        interrupted last iteration, and the time
+        lost to discarded iterations over all searches so far.
+        """
+        if self.dfpn_results:
+            return self.dfpn_stats()
+        lines = ["threat search nodes {} capture search nodes {}".format(
+            self.threat_nodes, self.capture_nodes)]
+        lines += ["depth {} nodes {} ebf {:.2f} time {:.3f}s{}".format(
+                    depth, nodes, nodes ** (1 / depth), seconds, "" if done else " (interrupted)")
+                 for depth, nodes, done, seconds in self.iteration_nodes]
+        lines.append("total nodes {} tt hits {} ebf {:.2f}".format(
+            self.nodes, self.tt.hits, self.time_manager.ebf()))
+        lines.append("pvs re-searches {} aspiration re-searches {}".format(
+            self.pvs_researches, self.aspiration_researches))
+        lines.append("lmr reductions {} re-searches {} futility prunes {}".format(
+            self.lmr_reductions, self.lmr_researches, self.futility_prunes))
+        if self.iteration_nodes and not self.iteration_nodes[-1][2]:
+            seconds = self.iteration_nodes[-1][3]
+            lines.append("interrupted iteration {:.3f}s of {:.3f}s budget ({:.0f}%), result {}".format(
+                seconds, self.budget, 100 * seconds / self.budget,
+                "used" if self.partial_used else "discarded"))
+        if self.budget_total > 0:
+            lines.append("wasted in all searches {:.3f}s of {:.3f}s ({:.0f}%)".format(
+                self.wasted_total, self.budget_total, 100 * self.wasted_total / self.budget_total))
+        return "\n".join(lines)
+
+    def dfpn_stats(self):
+        """
+        Returns the statistics of the last df-pn solve: the root proof
+        and disproof numbers and the nodes of each search.
+        """
+        def number(n):
+            return "inf" if n >= INF else str(n)
+        lines = ["dfpn attacker {} pn {} dn {} nodes {}".format(
+                    "b" if attacker == BLACK else "w", number(pn), number(dn), nodes)
+                 for attacker, pn, dn, nodes in self.dfpn_results]
+        lines.append("total nodes {} table entries {}".format(
+            sum(result[3] for result in self.dfpn_results), self.proof_table.entries))
+        return "\n".join(lines)
+
+    def solve_board(self, board, exact=True):
+        """
+        Search board within the time limit. exact=False restricts the
+        search to the candidate moves and allows the selective search,
+        which is faster but can only prove wins.
+        """
+        self.dfpn_results = []
+        distance = 0 if exact else self.options["candidate_distance"]
+        # genmove searches within the time manager's budget, solve uses the full limit
+        budget = None if exact else self.time_manager.move_budget(board.current_player, board.num_empty)
+        self.solve_start_time = time.time()
+        self.budget = self.time_limit if exact else budget
+        end_time = self.solve_start_time + self.budget - 0.01
+        move = NO_POINT
+        if not board.is_terminal()[0]:
+            move = self.threat_win(board, self.solve_start_time + THREAT_SHARE * self.budget)
+        if move != NO_POINT:
+            # forced win by threats or captures, no need for the full search
+            self.board = board.copy()
+            self.best_move = move
+            self.reset_stats()
+            self.budget_total += time.time() - self.solve_start_time
+            return "b" if board.current_player == BLACK else "w", \
+                format_point(point_to_coord(move, board.size)).lower()
+        pending = None
+        if self.pool is not None:
+            # Lazy SMP: the workers run the same search with their own root
+            # move order and depth offset, sharing only the transposition table
+            end_time -= POOL_MARGIN
+            self.stop.value = 0
+            tasks = [(board, end_time, random.getrandbits(32), i % 2, distance, not exact, self.options)
+                     for i in range(1, self.options["workers"])]
+            pending = self.pool.map_async(_search_worker, tasks)
+        self.deadline = Deadline(end_time, self.stop)
+        completed = self.iterative_deepening(board, candidate_distance=distance, budget=budget,
+                                             selective=not exact)
+        if pending is not None:
+            self.stop.value = 1  # done or solved: stop the helpers too
+            try:
+                results = pending.get(timeout=POOL_MARGIN)
+            except multiprocessing.TimeoutError:
+                results = []  # late workers: use the local result only
+            # keep a proof if there is one, otherwise the deepest result
+            for r in results:
+                if r is not None and (completed is None or (r[2], r[0]) > (completed[2], completed[0])):
+                    completed = r
+                    self.best_move = r[3]
+
+        if completed is None or not completed[2]:
             return "unknown", None
-        elif result == 1:
+        result = completed[1]
+        if result >= WIN_SCORE:
             if self.board.current_player == BLACK:
                 return "b", format_point(point_to_coord(self.best_move, self.board.size)).lower()
             else:
                 return "w", format_point(point_to_coord(self.best_move, self.board.size)).lower()
-        elif result == -1:
+        elif result <= -WIN_SCORE:
             if self.board.current_player == BLACK:
                 return "w", None
             else:
@@ -171,14 +649,229 @@ class ABPlayer(GoEngine):
         else:
             return "draw", format_point(point_to_coord(self.best_move, self.board.size)).lower()
 
+    def solve(self, board):
+        """
+        Solve board for the solve GTP command.
+        With several workers the root moves are split among the helper
+        processes, and each one solves the subtrees of its moves.
+        Otherwise this is solve_board.
+        """
+        if self.options["solver"] == "dfpn":
+            return self.solve_dfpn(board)
+        if self.pool is None or board.is_terminal()[0] or board.num_empty == 0:
+            return self.solve_board(board)
+        self.solve_start_time = time.time()
+        self.board = board.copy()
+        self.dfpn_results = []
+        self.reset_stats()
+        self.budget = self.time_limit
+        color = board.current_player
+        deadline = self.solve_start_time + self.time_limit - 0.01 - POOL_MARGIN
+        win_move = self.threat_win(board, self.solve_start_time + THREAT_SHARE * self.time_limit)
+        if win_move != NO_POINT:
+            self.best_move = win_move
+            return "b" if color == BLACK else "w", \
+                format_point(point_to_coord(win_move, board.size)).lower()
+        # immediate wins first, then blocks of opponent fives
+        moves = board.completion_points(color) + board.completion_points(opponent(color))
+        moves = list(dict.fromkeys(moves + GoBoardUtil.generate_legal_moves(board, color)))
+
+        # Iterative deepening over the root split: every round searches
+        # all unsolved moves one ply deeper, so no worker is stuck in one subtree
+        self.stop.value = 0
+        win_move = None
+        draw_move = None
+        open_moves = moves
+        max_depth = 1
+        timeout = False
+        while open_moves and win_move is None and not timeout:
+            start_time = time.time()
+            nodes = self.nodes
+            results = self.pool.imap_unordered(
+                _solve_worker, [(board, move, max_depth, deadline, self.options) for move in open_moves])
+            unsolved = set()
+            try:
+                for _ in open_moves:
+                    move, value, solved, move_timeout, move_nodes, researches = results.next(
+                        timeout=max(0, deadline - time.time()) + POOL_MARGIN)
+                    self.nodes += move_nodes
+                    self.pvs_researches += researches
+                    timeout = timeout or move_timeout
+                    if not solved:
+                        unsolved.add(move)
+                    elif value <= -WIN_SCORE:
+                        if win_move is None:
+                            win_move = move
+                    elif value < WIN_SCORE:
+                        draw_move = move
+            except multiprocessing.TimeoutError:
+                timeout = True
+                unsolved.update(open_moves)
+            open_moves = [move for move in open_moves if move in unsolved]
+            # the subtrees start below the root moves, one ply deeper
+            self.iteration_nodes.append(
+                (max_depth + 1, self.nodes - nodes, not timeout, time.time() - start_time))
+            max_depth += 1
+        self.stop.value = 1
+
+        if win_move is not None:
+            self.best_move = win_move
+            return "b" if color == BLACK else "w", \
+                format_point(point_to_coord(win_move, board.size)).lower()
+        if open_moves:
+            return "unknown", None
+        if draw_move is not None:
+            self.best_move = draw_move
+            return "draw", format_point(point_to_coord(draw_move, board.size)).lower()
+        return "w" if color == BLACK else "b", None
+
+    def solve_dfpn(self, board):
+        """
+        Solve board with df-pn within the time limit. The first search
+        tries to prove a win for the player to move. After a disproof,
+        the second one tries to prove a win for the opponent; its
+        disproof means a draw.
+        """
+        self.dfpn_results = []
+        self.reset_stats()
+        self.budget = self.time_limit
+        start_time = time.time()
+        color = board.current_player
+        to_play = "b" if color == BLACK else "w"
+        other = "w" if color == BLACK else "b"
+        move = NO_POINT
+        if not board.is_terminal()[0]:
+            move = self.threat_win(board, start_time + THREAT_SHARE * self.time_limit)
+        if move != NO_POINT:
+            self.best_move = move
+            return to_play, format_point(point_to_coord(move, board.size)).lower()
+        solver = DfpnSolver(self.proof_table, Deadline(start_time + self.time_limit - 0.01))
+        for attacker in (color, opponent(color)):
+            pn, dn = solver.prove(board, attacker)
+            self.dfpn_results.append((attacker, pn, dn, solver.nodes))
+            solver.nodes = 0
+            if pn == 0 and attacker == color:
+                self.best_move = solver.proof_move()
+                return to_play, format_point(point_to_coord(self.best_move, board.size)).lower()
+            if pn == 0:
+                return other, None
+            if dn != 0:
+                return "unknown", None
+        self.best_move = solver.proof_move()
+        if self.best_move == NO_POINT:
+            return "draw", None
+        return "draw", format_point(point_to_coord(self.best_move, board.size)).lower()
+
     def set_time_limit(self, time_limit):
         self.time_limit = time_limit
+        self.time_manager.time_limit = time_limit
+
+    def set_time_settings(self, main_time, byo_yomi_time, byo_yomi_stones):
+        self.time_manager.set_time_settings(main_time, byo_yomi_time, byo_yomi_stones)
+
+    def set_time_left(self, color, seconds, stones):
+        self.time_manager.set_time_left(color, seconds, stones)
+
+    def set_option(self, name: str, value: str) -> None:
+        previous = self.options.get(name)
+        GoEngine.set_option(self, name, value)
+        if name == "workers" and self.options["workers"] < 1:
+            self.options["workers"] = 1
+            raise ValueError("workers must be at least 1")
+        if name == "solver" and self.options["solver"] not in SOLVERS:
+            self.options["solver"] = previous
+            raise ValueError("solver must be one of " + ", ".join(SOLVERS))
+        if name in ("tt_mb", "workers"):
+            self.start_workers()
+        if name == "dfpn_mb":
+            self.proof_table = ProofTable(self.options["dfpn_mb"])
+
+    def start_workers(self) -> None:
+        """
+        (Re)create the transposition table and, for more than one worker,
+        the pool of helper processes. The helpers are forked so that they
+        inherit this player with the shared table and the stop flag.
+        There is one helper per worker: a parallel solve_board uses the
+        main process and workers - 1 helpers, solve uses all helpers.
+        """
+        self.stop_workers()
+        workers = self.options["workers"]
+        self.tt = TranspositionTable(self.options["tt_mb"], shared=workers > 1)
+        if workers > 1:
+            context = multiprocessing.get_context("fork")
+            self.stop = context.RawValue('b', 0)
+            self.pool = context.Pool(workers, initializer=_init_worker, initargs=(self,))
+
+    def stop_workers(self) -> None:
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool = None
+            self.stop = None
+        self.tt.close()
+
+
+"""
+Player of a helper process, see ABPlayer.start_workers
+"""
+_worker_player: ABPlayer = None
+
+
+def _init_worker(player: ABPlayer) -> None:
+    """
+    Search with the forked copy of the main player. Its tables are only
+    copied when written to, and its transposition table is the shared one,
+    so a helper allocates no tables of its own.
+    """
+    global _worker_player
+    _worker_player = player
+
+
+def _search_worker(args):
+    board, end_time, seed, depth_offset, candidate_distance, selective, options = args
+    random.seed(seed)
+    _worker_player.options = options
+    _worker_player.solve_start_time = time.time()
+    _worker_player.deadline = Deadline(end_time, _worker_player.stop)
+    completed = _worker_player.iterative_deepening(
+        board, 1 + depth_offset, candidate_distance, selective=selective)
+    if completed is not None and completed[2]:
+        _worker_player.stop.value = 1  # a proof ends the search of all workers
+    return completed
+
+
+def _solve_worker(args):
+    """
+    Search the subtree of one root move to max_depth for ABPlayer.solve.
+    Returns the move and the (value, solved, timeout) result of the search,
+    from the point of view of the opponent who is to play after move,
+    then the nodes searched and the null window re-searches.
+    """
+    board, move, max_depth, end_time, options = args
+    _worker_player.options = options
+    _worker_player.deadline = Deadline(end_time, _worker_player.stop)
+    _worker_player.board = board.copy()
+    _worker_player.board.play_move(move, board.current_player)
+    _worker_player.max_depth = max_depth
+    if max_depth == 1:
+        _worker_player.reset_ordering(board.maxpoint)
+    _worker_player.candidate_distance = 0
+    _worker_player.selective = False
+    _worker_player.pv_move = NO_POINT  # no previous iteration for this subtree
+    _worker_player.reset_stats()
+    value, solved, timeout = _worker_player.alpha_beta(-WIN_SCORE, WIN_SCORE, 0)
+    if solved and value <= -WIN_SCORE:
+        _worker_player.stop.value = 1  # move wins: cancel the other subtrees
+    return move, value, solved, timeout, _worker_player.nodes, _worker_player.pvs_researches
+
 
 def run() -> None:
     """
     start the gtp connection and wait for commands.
+    The bitmask board backend is the default, it plays and undoes
+    moves faster. Pass --goboard to use the numpy GoBoard instead.
     """
-    board: GoBoard = GoBoard(DEFAULT_SIZE)
+    board_class = GoBoard if "--goboard" in sys.argv[1:] else BitBoard
+    board: GoBoard = board_class(DEFAULT_SIZE)
     con: GtpConnection = GtpConnection(ABPlayer(), board)
     con.start_connection()
 
@@ -0,0 +1,493 @@
+"""
+bitboard.py
+Bitmask board backend for Ninuki, used by default by both players.
+
+BitBoard keeps the position in one Python int bitmask per color
+instead of a padded numpy array. Bit i of a mask is array index i
+of the padded 1D representation used by GoBoard (see coord_to_point),
+so points, moves and GTP coordinates are identical for both backends.
+
+Five-in-a-row, capture patterns and empty-point queries are
+shift-and-mask operations on these integers. BitBoard is a drop-in
+replacement for GoBoard: engines only ever see the GoBoard interface,
+and board.copy() keeps the backend, so a player selects it by
+constructing its GtpConnection with a BitBoard.
+"""
+
+import numpy as np
+from typing import Dict, List, Tuple
+
+from board_base import (
+    board_array_size,
+    coord_to_point,
+    opponent,
+    BLACK,
+    WHITE,
+    EMPTY,
+    BORDER,
+    NO_POINT,
+    PASS,
+    GO_COLOR,
+    GO_POINT,
+    ZOBRIST_POINTS,
+    ZOBRIST_CAPTURES,
+)
+from board import GoBoard, CANDIDATE_DISTANCE
+
+
+"""
+Per board size tables, computed once and shared by all BitBoards:
+    on_board:  mask of all points on the board
+    shifts:    bit distance between neighbors in the 4 line directions
+    captures:  for each point, the (pair mask, end mask, p1, p2) tuples
+               of the XOOX capture patterns starting at that point
+    neighbors: for each point, the mask of the first stones of its
+               capture patterns, used to skip the pattern loop
+    num_points: size * size
+"""
+_TABLES: Dict[int, Tuple[int, List[int], List[List[Tuple[int, int, int, int]]], List[int], int]] = {}
+
+
+def _size_tables(size: int) -> Tuple[int, List[int], List[List[Tuple[int, int, int, int]]], List[int], int]:
+    if size not in _TABLES:
+        NS = size + 1
+        points = [coord_to_point(row, col, size)
+                  for row in range(1, size + 1)
+                  for col in range(1, size + 1)]
+        on_board_points = set(int(p) for p in points)
+        on_board = 0
+        for p in on_board_points:
+            on_board |= 1 << p
+        offsets = [1, -1, NS, -NS, NS + 1, -(NS + 1), NS - 1, -NS + 1]
+        captures: List[List[Tuple[int, int, int, int]]] = [[] for _ in range(board_array_size(size))]
+        neighbors: List[int] = [0] * board_array_size(size)
+        for p in on_board_points:
+            for offset in offsets:
+                p1, p2, p3 = p + offset, p + 2 * offset, p + 3 * offset
+                if p1 in on_board_points and p2 in on_board_points and p3 in on_board_points:
+                    captures[p].append(((1 << p1) | (1 << p2), 1 << p3, p1, p2))
+                    neighbors[p] |= 1 << p1
+        _TABLES[size] = (on_board, [1, NS, NS + 1, NS - 1], captures, neighbors, len(points))
+    return _TABLES[size]
+
+
+def has_five(mask: int, shifts: List[int]) -> bool:
+    """
+    Return whether mask contains five consecutive bits along any
+    of the line directions given by shifts.
+    """
+    for d in shifts:
+        pairs = mask & (mask >> d)
+        fours = pairs & (pairs >> (2 * d))
+        if fours & (mask >> (4 * d)):
+            return True
+    return False
+
+
+class BitBoard(GoBoard):
+    def reset(self, size: int) -> None:
+        """
+        Creates a start state, an empty board with given size.
+        """
+        self.size: int = size
+        self.NS: int = size + 1
+        self.WE: int = 1
+        self.last_move: GO_POINT = NO_POINT
+        self.last2_move: GO_POINT = NO_POINT
+        self.current_player: GO_COLOR = BLACK
+        self.maxpoint: int = board_array_size(size)
+        self.on_board, self.shifts, self.capture_patterns, self.capture_neighbors, self.num_points = \
+            _size_tables(size)
+        # stone masks indexed by color, EMPTY and BORDER entries stay 0
+        self._initialize_line_tables()
+        # the 5 bits of a window along each shift, starting at bit 0
+        self.window_spans: List[int] = [sum(1 << (k * d) for k in range(5)) for d in self.shifts]
+        self.masks: List[int] = [0, 0, 0, 0]
+        self.num_stones: int = 0
+        self.candidate_distance: int = CANDIDATE_DISTANCE
+        self._board_cache = None
+        # window counts by color, and per move the counts before it
+        self._window_cache = [None, None, None]
+        self._window_history = []
+        self._hash = ZOBRIST_CAPTURES[BLACK][0] ^ ZOBRIST_CAPTURES[WHITE][0]
+        self.black_captures = 0
+        self.white_captures = 0
+        self.depth = 0
+        self.black_capture_history = []
+        self.white_capture_history = []
+        self.move_history = []
+
+    def copy(self) -> 'BitBoard':
+        b = BitBoard.__new__(BitBoard)
+        b.size = self.size
+        b.NS = self.NS
+        b.WE = self.WE
+        b.last_move = self.last_move
+        b.last2_move = self.last2_move
+        b.current_player = self.current_player
+        b.maxpoint = self.maxpoint
+        b.on_board = self.on_board
+        b.shifts = self.shifts
+        b.capture_patterns = self.capture_patterns
+        b.capture_neighbors = self.capture_neighbors
+        b.num_points = self.num_points
+        b.windows = self.windows
+        b.point_windows = self.point_windows
+        b.rays = self.rays
+        b.masks = self.masks.copy()
+        b.num_stones = self.num_stones
+        b.candidate_distance = self.candidate_distance
+        b._board_cache = None
+        b._window_cache = self._window_cache.copy()
+        b._window_history = [([None, None, None], point, color, False)
+                             for _, point, color, _ in self._window_history]
+        b.window_spans = self.window_spans
+        b._hash = self._hash
+        b.black_captures = self.black_captures
+        b.white_captures = self.white_captures
+        b.depth = self.depth
+        b.black_capture_history = self.black_capture_history.copy()
+        b.white_capture_history = self.white_capture_history.copy()
+        b.move_history = self.move_history.copy()
+        return b
+
+    @property
+    def board(self) -> np.ndarray:
+        """
+        The position in the padded 1D array format of GoBoard.
+        Built on demand and cached until the next move or undo.
+        Treat it as read-only: writes do not reach the bitmasks.
+        """
+        if self._board_cache is None:
+            self._board_cache = self._to_array()
+        return self._board_cache
+
+    def _bits(self, mask: int) -> np.ndarray:
+        """ Unpack mask into a boolean array of length maxpoint """
+        nbytes = (self.maxpoint + 7) // 8
+        raw = np.frombuffer(mask.to_bytes(nbytes, "little"), dtype=np.uint8)
+        return np.unpackbits(raw, bitorder="little")[: self.maxpoint].view(bool)
+
+    def _to_array(self) -> np.ndarray:
+        board_array = np.full(self.maxpoint, BORDER, dtype=GO_POINT)
+        board_array[self._bits(self.on_board)] = EMPTY
+        board_array[self._bits(self.masks[BLACK])] = BLACK
+        board_array[self._bits(self.masks[WHITE])] = WHITE
+        return board_array
+
+    def get_color(self, point: GO_POINT) -> GO_COLOR:
+        point = int(point)
+        if point < 0:
+            return BORDER
+        bit = 1 << point
+        if self.masks[BLACK] & bit:
+            return BLACK
+        if self.masks[WHITE] & bit:
+            return WHITE
+        if self.on_board & bit:
+            return EMPTY
+        return BORDER
+
+    def is_legal(self, point: GO_POINT, color: GO_COLOR) -> bool:
+        if point == PASS:
+            return True
+        point = int(point)
+        return point >= 0 and (self.empty_mask() >> point) & 1 == 1
+
+    def end_of_game(self) -> bool:
+        return self.num_stones == self.num_points or (self.last_move == PASS and self.last2_move == PASS)
+
+    def empty_mask(self) -> int:
+        return self.on_board & ~(self.masks[BLACK] | self.masks[WHITE])
+
+    def get_empty_points(self) -> np.ndarray:
+        """
+        Return:
+            The empty points on the board
+        """
+        return np.flatnonzero(self._bits(self.empty_mask())).astype(GO_POINT)
+
+    @property
+    def num_empty(self) -> int:
+        return self.num_points - self.num_stones
+
+    def get_empty_point_list(self) -> List[GO_POINT]:
+        """
+        Return:
+            The empty points on the board as a new Python list.
+        """
+        return self.get_empty_points().tolist()
+
+    def candidate_mask(self) -> int:
+        """
+        Mask of the empty points within candidate_distance of a stone:
+        the stones dilated by one point per step, first along rows
+        and then along columns, which gives the Chebyshev neighborhood.
+        Masking with on_board after each step keeps rows from wrapping.
+        """
+        stones = self.masks[BLACK] | self.masks[WHITE]
+        near = stones
+        for _ in range(self.candidate_distance):
+            near = (near | (near << 1) | (near >> 1)) & self.on_board
+        for _ in range(self.candidate_distance):
+            near = (near | (near << self.NS) | (near >> self.NS)) & self.on_board
+        return near & ~stones
+
+    def get_candidate_list(self) -> List[GO_POINT]:
+        """
+        Return:
+            The empty points within candidate_distance of a stone,
+            as a new Python list. Empty if there are no stones.
+        """
+        return np.flatnonzero(self._bits(self.candidate_mask())).tolist()
+
+    def set_candidate_distance(self, distance: int) -> None:
+        self.candidate_distance = distance
+
+    def play_move(self, point: GO_POINT, color: GO_COLOR) -> bool:
+        """
+        Tries to play a move of color on the point.
+        Returns whether or not the point was empty.
+        """
+        point = int(point)
+        if point < 0:
+            return False
+        bit = 1 << point
+        if not self.on_board & bit or (self.masks[BLACK] | self.masks[WHITE]) & bit:
+            return False
+        O = opponent(color)
+        own = self.masks[color] | bit
+        opp = self.masks[O]
+        h = self._hash ^ ZOBRIST_POINTS[color][point]
+        captured = []
+        if opp & self.capture_neighbors[point]:
+            for pair, end, p1, p2 in self.capture_patterns[point]:
+                if opp & pair == pair and own & end:
+                    opp ^= pair
+                    h ^= ZOBRIST_POINTS[O][p1] ^ ZOBRIST_POINTS[O][p2]
+                    captured.append(p1)
+                    captured.append(p2)
+        self.masks[color] = own
+        self.masks[O] = opp
+        self.num_stones += 1 - len(captured)
+        if color == BLACK:
+            if captured:
+                h ^= ZOBRIST_CAPTURES[BLACK][self.black_captures]
+                self.black_captures += len(captured)
+                h ^= ZOBRIST_CAPTURES[BLACK][self.black_captures]
+            self.black_capture_history.append(captured)
+            self.white_capture_history.append([])
+        else:
+            if captured:
+                h ^= ZOBRIST_CAPTURES[WHITE][self.white_captures]
+                self.white_captures += len(captured)
+                h ^= ZOBRIST_CAPTURES[WHITE][self.white_captures]
+            self.black_capture_history.append([])
+            self.white_capture_history.append(captured)
+        self._hash = h
+        self.current_player = O
+        self.last2_move = self.last_move
+        self.last_move = point
+        self.depth += 1
+        self.move_history.append(point)
+        self._board_cache = None
+        self._window_history.append((self._window_cache, point, color, not captured))
+        self._window_cache = [None, None, None]
+        return True
+
+    def undo(self):
+        move = self.move_history.pop()
+        self._window_cache, _, color, _ = self._window_history.pop()
+        O = opponent(color)
+        h = self._hash ^ ZOBRIST_POINTS[color][move]
+        self.masks[color] &= ~(1 << move)
+        bcs = self.black_capture_history.pop()
+        wcs = self.white_capture_history.pop()
+        captured = bcs if color == BLACK else wcs
+        if captured:
+            opp = self.masks[O]
+            for point in captured:
+                opp |= 1 << point
+                h ^= ZOBRIST_POINTS[O][point]
+            self.masks[O] = opp
+            if color == BLACK:
+                h ^= ZOBRIST_CAPTURES[BLACK][self.black_captures]
+                self.black_captures -= len(captured)
+                h ^= ZOBRIST_CAPTURES[BLACK][self.black_captures]
+            else:
+                h ^= ZOBRIST_CAPTURES[WHITE][self.white_captures]
+                self.white_captures -= len(captured)
+                h ^= ZOBRIST_CAPTURES[WHITE][self.white_captures]
+        self._hash = h
+        self.current_player = opponent(self.current_player)
+        self.depth -= 1
+        self.num_stones += len(captured) - 1
+        if len(self.move_history) > 0:
+            self.last_move = self.move_history[-1]
+        if len(self.move_history) > 1:
+            self.last2_move = self.move_history[-2]
+        self._board_cache = None
+
+    def full_board_detect_five_in_a_row(self) -> GO_COLOR:
+        """
+        Returns BLACK or WHITE if any five in a row is detected for the color
+        EMPTY otherwise.
+        Checks the entire board.
+        """
+        for color in (BLACK, WHITE):
+            if has_five(self.masks[color], self.shifts):
+                return color
+        return EMPTY
+
+    def detect_five_in_a_row(self) -> GO_COLOR:
+        """
+        Returns BLACK or WHITE if any five in a row is detected for the color
+        EMPTY otherwise.
+        Only checks the color of the last move.
+        """
+        if self.last_move == NO_POINT or self.last_move == PASS:
+            return EMPTY
+        c = self.get_color(self.last_move)
+        if c != BLACK and c != WHITE:
+            return EMPTY
+        if has_five(self.masks[c], self.shifts):
+            return c
+        return EMPTY
+
+    def _window_counts(self, color: GO_COLOR) -> List[Tuple[int, int, int, int, int]]:
+        """
+        Bit-parallel stone count of all 5-point windows free of opponent stones.
+        Returns one (shift, free, s0, s1, s2) tuple per line direction:
+        bit p of free is set if the window starting at p holds no opponent
+        stone, and bits p of s2 s1 s0 are the number of color stones in it.
+        Cached until the next play_move, and restored by undo. After
+        a move without captures the counts are updated from those of
+        the previous position, if they were cached.
+        """
+        cached = self._window_cache[color]
+        if cached is not None:
+            return cached
+        if self._window_history and self._window_history[-1][3] \
+                and self._window_history[-1][0][color] is not None:
+            result = self._update_window_counts(color)
+            self._window_cache[color] = result
+            return result
+        own = self.masks[color]
+        available = own | self.empty_mask()
+        result = []
+        for d in self.shifts:
+            d2 = d + d
+            pairs = available & (available >> d)
+            free = pairs & (pairs >> d2) & (available >> (d2 + d2))
+            # add the first four planes as two 2-bit sums, then the fifth
+            a, b = own, own >> d
+            c, e = own >> d2, own >> (d2 + d)
+            x0, x1 = a ^ b, a & b
+            y0, y1 = c ^ e, c & e
+            s0 = x0 ^ y0
+            carry = x0 & y0
+            t = x1 ^ y1
+            s1 = t ^ carry
+            s2 = (x1 & y1) | (t & carry)
+            plane = own >> (d2 + d2)
+            carry = s0 & plane
+            s0 ^= plane
+            s2 |= s1 & carry
+            s1 ^= carry
+            result.append((d, free, s0 & free, s1 & free, s2 & free))
+        self._window_cache[color] = result
+        return result
+
+    def _update_window_counts(self, color: GO_COLOR) -> List[Tuple[int, int, int, int, int]]:
+        """
+        The window counts of color after the last move, from the counts
+        before it. The move adds one stone to the free windows through
+        its point if color played it, else it makes them not free.
+        """
+        counts, point, mover, _ = self._window_history[-1]
+        result = []
+        for (d, free, s0, s1, s2), span in zip(counts[color], self.window_spans):
+            windows = (span << point) >> (4 * d)
+            if mover == color:
+                windows &= free
+                carry = s0 & windows
+                s0 ^= windows
+                s2 |= s1 & carry
+                s1 ^= carry
+            else:
+                windows = ~windows
+                free &= windows
+                s0 &= windows
+                s1 &= windows
+                s2 &= windows
+            result.append((d, free, s0, s1, s2))
+        return result
+
+    def _points(self, mask: int) -> List[GO_POINT]:
+        """ The points of the set bits of mask, in increasing order """
+        result = []
+        while mask:
+            low = mask & -mask
+            result.append(low.bit_length() - 1)
+            mask ^= low
+        return result
+
+    def completion_points(self, color: GO_COLOR) -> List[GO_POINT]:
+        """
+        Returns the empty points where color completes five in a row.
+        """
+        return self.threat_points(color, 4)
+
+    def threat_points(self, color: GO_COLOR, stones: int) -> List[GO_POINT]:
+        """
+        Returns the empty points of the windows holding the given number
+        of stones of color and no opponent stone. For stones == 3 these
+        are the points where color makes a four.
+        """
+        empty = self.empty_mask()
+        points = 0
+        for d, free, s0, s1, s2 in self._window_counts(color):
+            # at most five stones, so s2 is set only for four and five
+            if stones >= 4:
+                windows = s2 & s0 if stones & 1 else s2 & ~s0
+            elif stones >= 2:
+                windows = s1 & s0 if stones & 1 else s1 & ~s0
+            else:
+                windows = free & ~(s1 | s2) & (s0 if stones else ~s0)
+            if windows:
+                for k in range(5):
+                    points |= (windows & (empty >> (k * d))) << (k * d)
+        return self._points(points)
+
+    def capture_points(self, color: GO_COLOR) -> List[GO_POINT]:
+        """
+        Returns the empty points where color captures at least one pair.
+        """
+        own = self.masks[color]
+        opp = self.masks[opponent(color)]
+        points = 0
+        for d in self.shifts:
+            pairs = opp & (opp << d)
+            if pairs:
+                points |= (pairs << d) & (own << (3 * d))
+                points |= (pairs >> (2 * d)) & (own >> (3 * d))
+        return self._points(points & self.empty_mask())
+
+    def threat_summary(self, color: GO_COLOR) -> Tuple[int, int, int]:
+        """
+        Returns the number of windows holding five, four and three stones
+        of color and no opponent stone.
+        """
+        fives = fours = threes = 0
+        for d, free, s0, s1, s2 in self._window_counts(color):
+            if s2:
+                fives += bin(s2 & s0).count("1")
+                fours += bin(s2 & ~s0).count("1")
+            if s1 & s0:
+                threes += bin(s1 & s0).count("1")
+        return fives, fours, threes
+
+    def state_to_str(self):
+        return "{:x}/{:x}/{}/{}/{}".format(self.masks[BLACK], self.masks[WHITE],
+                                          self.current_player, self.black_captures,
+                                          self.white_captures)
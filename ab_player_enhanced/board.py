@@ -12,7 +12,7 @@ The board uses a 1-dimensional representation with padding
 """
 
 import numpy as np
-from typing import List, Tuple
+from typing import Dict, List, Tuple
 
 from board_base import (
     board_array_size,
@@ -30,8 +30,48 @@ from board_base import (
     PASS,
     GO_COLOR,
     GO_POINT,
+    ZOBRIST_POINTS,
+    ZOBRIST_WHITE_TO_PLAY,
+    ZOBRIST_CAPTURES,
 )
 
+"""
+Empty point lists of the empty board, per board size.
+See GoBoard._initialize_empty_index.
+"""
+_EMPTY_INDEX_CACHE: Dict[int, Tuple[List[GO_POINT], List[int]]] = {}
+
+"""
+Default Chebyshev distance of the candidate move set:
+empty points at most this many rows and columns away from a stone.
+See GoBoard.set_candidate_distance.
+"""
+CANDIDATE_DISTANCE = 2
+
+"""
+Points within a Chebyshev distance of each point, per (board size, distance).
+See GoBoard._initialize_candidates.
+"""
+_NEIGHBORHOOD_CACHE: Dict[Tuple[int, int], List[List[GO_POINT]]] = {}
+
+"""
+Line directions as (row, col) steps: vertical, horizontal and the two diagonals.
+"""
+DIRECTIONS: List[Tuple[int, int]] = [(1, 0), (0, 1), (1, 1), (1, -1)]
+
+"""
+Precomputed line tables, per board size:
+    windows:       int array of shape (num_windows, 5) with the points of
+                   every 5-point window on the board, in all 4 directions
+    point_windows: for each point, the ids of the windows through it
+    rays:          for each point and direction in DIRECTIONS, the tuples of
+                   points going forward and backward up to the board edge
+    window_points: the windows as a list of point tuples
+See GoBoard._initialize_line_tables.
+"""
+_LINE_TABLE_CACHE: Dict[int, Tuple[np.ndarray, List[List[int]],
+                                   List[List[Tuple[Tuple[int, ...], Tuple[int, ...]]]],
+                                   List[Tuple[int, ...]]]] = {}
 
 """
 The GoBoard class implements a board and basic functions to play
@@ -58,9 +98,13 @@ class GoBoard(object):
 
     def add_two_captures(self, color: GO_COLOR) -> None:
         if color == BLACK:
+            self._hash ^= ZOBRIST_CAPTURES[BLACK][self.black_captures]
             self.black_captures += 2
+            self._hash ^= ZOBRIST_CAPTURES[BLACK][self.black_captures]
         elif color == WHITE:
+            self._hash ^= ZOBRIST_CAPTURES[WHITE][self.white_captures]
             self.white_captures += 2
+            self._hash ^= ZOBRIST_CAPTURES[WHITE][self.white_captures]
     
     def get_captures(self, color: GO_COLOR) -> None:
         if color == BLACK:
@@ -81,6 +125,11 @@ class GoBoard(object):
         self.maxpoint: int = board_array_size(size)
         self.board: np.ndarray[GO_POINT] = np.full(self.maxpoint, BORDER, dtype=GO_POINT)
         self._initialize_empty_points(self.board)
+        self._initialize_empty_index()
+        self._initialize_line_tables()
+        self._initialize_window_counts()
+        self._initialize_candidates(CANDIDATE_DISTANCE)
+        self._hash = ZOBRIST_CAPTURES[BLACK][0] ^ ZOBRIST_CAPTURES[WHITE][0]
         self.black_captures = 0
         self.white_captures = 0
         self.depth = 0
@@ -97,6 +146,20 @@ class GoBoard(object):
         b.current_player = self.current_player
         assert b.maxpoint == self.maxpoint
         b.board = np.copy(self.board)
+        b._hash = self._hash
+        b.empty_list = self.empty_list.copy()
+        b.empty_index = self.empty_index.copy()
+        b.num_empty = self.num_empty
+        if b.candidate_distance != self.candidate_distance:
+            b.neighborhoods = self.neighborhoods
+            b.candidate_distance = self.candidate_distance
+        b.near_stones = self.near_stones.copy()
+        b.candidate_list = self.candidate_list.copy()
+        b.candidate_index = self.candidate_index.copy()
+        b.num_candidates = self.num_candidates
+        b.window_stones = [counts.copy() for counts in self.window_stones]
+        b.window_threats = [counts.copy() for counts in self.window_threats]
+        b.four_windows = [windows.copy() for windows in self.four_windows]
         b.black_captures = self.black_captures
         b.white_captures = self.white_captures
         b.depth = self.depth
@@ -105,6 +168,19 @@ class GoBoard(object):
         b.move_history = self.move_history.copy()
         return b
 
+    @property
+    def hash(self) -> int:
+        """
+        64-bit Zobrist hash of the position: stones, capture counts
+        and side to move.
+        Stones and captures are updated incrementally by play_move and undo.
+        The side to move is mixed in here, so engines may still assign
+        current_player directly.
+        """
+        if self.current_player == WHITE:
+            return self._hash ^ ZOBRIST_WHITE_TO_PLAY
+        return self._hash
+
     def get_color(self, point: GO_POINT) -> GO_COLOR:
         return self.board[point]
 
@@ -125,14 +201,41 @@ class GoBoard(object):
         return self.board[point] == EMPTY
 
     def end_of_game(self) -> bool:
-        return self.get_empty_points().size == 0 or (self.last_move == PASS and self.last2_move == PASS)
+        return self.num_empty == 0 or (self.last_move == PASS and self.last2_move == PASS)
            
     def get_empty_points(self) -> np.ndarray:
         """
         Return:
             The empty points on the board
         """
-        return where1d(self.board == EMPTY)
+        return np.array(self.empty_list[:self.num_empty], dtype=GO_POINT)
+
+    def get_empty_point_list(self) -> List[GO_POINT]:
+        """
+        Return:
+            The empty points on the board as a new Python list.
+            The order changes as moves are played and undone.
+        """
+        return self.empty_list[:self.num_empty]
+
+    def get_candidate_list(self) -> List[GO_POINT]:
+        """
+        Return:
+            The empty points within candidate_distance of a stone,
+            as a new Python list. Empty if there are no stones.
+        """
+        return self.candidate_list[:self.num_candidates]
+
+    def set_candidate_distance(self, distance: int) -> None:
+        """
+        Change the distance of the candidate set and rebuild it
+        from the stones on the board.
+        """
+        if distance == self.candidate_distance:
+            return
+        self._initialize_candidates(distance)
+        for point in where1d((self.board == BLACK) | (self.board == WHITE)):
+            self._stone_added(int(point))
 
     def row_start(self, row: int) -> int:
         assert row >= 1
@@ -150,6 +253,227 @@ class GoBoard(object):
             start: int = self.row_start(row)
             board_array[start : start + self.size] = EMPTY
 
+    def _initialize_empty_index(self) -> None:
+        """
+        Sets up the incremental empty point set:
+        empty_list[:num_empty] holds the empty points, and
+        empty_index maps each point to its position in empty_list, or -1.
+        The start lists are built once per board size.
+        """
+        if self.size not in _EMPTY_INDEX_CACHE:
+            empty_list = [int(p) for p in where1d(self.board == EMPTY)]
+            empty_index = [-1] * self.maxpoint
+            for i, point in enumerate(empty_list):
+                empty_index[point] = i
+            _EMPTY_INDEX_CACHE[self.size] = (empty_list, empty_index)
+        empty_list, empty_index = _EMPTY_INDEX_CACHE[self.size]
+        self.empty_list: List[GO_POINT] = empty_list.copy()
+        self.empty_index: List[int] = empty_index.copy()
+        self.num_empty: int = len(empty_list)
+
+    def _initialize_candidates(self, distance: int) -> None:
+        """
+        Sets up the incremental candidate move set for an empty board:
+            near_stones[p]:  number of stones within distance of point p,
+                             a reference count kept by play_move and undo
+            candidate_list[:num_candidates]: the empty points with
+                             near_stones > 0, with candidate_index as for
+                             empty_list
+        The neighborhood lists are built once per board size and distance.
+        """
+        key = (self.size, distance)
+        if key not in _NEIGHBORHOOD_CACHE:
+            neighborhoods: List[List[GO_POINT]] = [[] for _ in range(self.maxpoint)]
+            for row in range(1, self.size + 1):
+                for col in range(1, self.size + 1):
+                    neighborhoods[self.pt(row, col)] = [
+                        self.pt(r, c)
+                        for r in range(max(1, row - distance), min(self.size, row + distance) + 1)
+                        for c in range(max(1, col - distance), min(self.size, col + distance) + 1)
+                        if (r, c) != (row, col)]
+            _NEIGHBORHOOD_CACHE[key] = neighborhoods
+        self.candidate_distance: int = distance
+        self.neighborhoods: List[List[GO_POINT]] = _NEIGHBORHOOD_CACHE[key]
+        self.near_stones: List[int] = [0] * self.maxpoint
+        self.candidate_list: List[GO_POINT] = [0] * (self.size * self.size)
+        self.candidate_index: List[int] = [-1] * self.maxpoint
+        self.num_candidates: int = 0
+
+    def _add_candidate(self, point: GO_POINT) -> None:
+        self.candidate_list[self.num_candidates] = point
+        self.candidate_index[point] = self.num_candidates
+        self.num_candidates += 1
+
+    def _remove_candidate(self, point: GO_POINT) -> None:
+        i = self.candidate_index[point]
+        self.num_candidates -= 1
+        last = self.candidate_list[self.num_candidates]
+        self.candidate_list[i] = last
+        self.candidate_index[last] = i
+        self.candidate_index[point] = -1
+
+    def _stone_added(self, point: GO_POINT) -> None:
+        """
+        Update the candidate set for a stone placed on point.
+        """
+        if self.candidate_index[point] >= 0:
+            self._remove_candidate(point)
+        near_stones = self.near_stones
+        for p in self.neighborhoods[point]:
+            near_stones[p] += 1
+            if near_stones[p] == 1 and self.board[p] == EMPTY:
+                self._add_candidate(p)
+
+    def _stone_removed(self, point: GO_POINT) -> None:
+        """
+        Update the candidate set for a stone removed from point.
+        """
+        near_stones = self.near_stones
+        for p in self.neighborhoods[point]:
+            near_stones[p] -= 1
+            if near_stones[p] == 0 and self.candidate_index[p] >= 0:
+                self._remove_candidate(p)
+        if near_stones[point] > 0:
+            self._add_candidate(point)
+
+    def _initialize_line_tables(self) -> None:
+        """
+        Sets windows, point_windows and rays for the current board size.
+        The tables are built once per size and shared by all boards.
+        """
+        if self.size not in _LINE_TABLE_CACHE:
+            size = self.size
+
+            def line(row: int, col: int, step: Tuple[int, int], length: int) -> List[int]:
+                """ On-board points from (row, col) in direction step, at most length """
+                points = []
+                while len(points) < length and 1 <= row <= size and 1 <= col <= size:
+                    points.append(int(coord_to_point(row, col, size)))
+                    row += step[0]
+                    col += step[1]
+                return points
+
+            windows: List[List[int]] = []
+            point_windows: List[List[int]] = [[] for _ in range(self.maxpoint)]
+            rays: List[List[Tuple[Tuple[int, ...], Tuple[int, ...]]]] = [[] for _ in range(self.maxpoint)]
+            for row in range(1, size + 1):
+                for col in range(1, size + 1):
+                    point = int(coord_to_point(row, col, size))
+                    for step in DIRECTIONS:
+                        window = line(row, col, step, 5)
+                        if len(window) == 5:
+                            for p in window:
+                                point_windows[p].append(len(windows))
+                            windows.append(window)
+                        forward = line(row + step[0], col + step[1], step, size)
+                        backward = line(row - step[0], col - step[1], (-step[0], -step[1]), size)
+                        rays[point].append((tuple(forward), tuple(backward)))
+            window_array = np.array(windows, dtype=GO_POINT).reshape(-1, 5)
+            window_points = [tuple(window) for window in windows]
+            _LINE_TABLE_CACHE[size] = (window_array, point_windows, rays, window_points)
+        self.windows, self.point_windows, self.rays, self.window_points = _LINE_TABLE_CACHE[self.size]
+
+    def _initialize_window_counts(self) -> None:
+        """
+        Sets up the per-window stone counters, indexed by color:
+            window_stones[c][w]:  number of stones of color c in window w
+            window_threats[c][n]: number of windows with n stones of color c
+                                  and no stones of the opponent
+            four_windows[c]:      ids of the windows with 4 stones of c and
+                                  no opponent stone, so one empty point
+        play_move, captures and undo keep them up to date.
+        """
+        num_windows = len(self.window_points)
+        self.window_stones: List[List[int]] = [[], [0] * num_windows, [0] * num_windows]
+        self.window_threats: List[List[int]] = [[], [num_windows, 0, 0, 0, 0, 0],
+                                                [num_windows, 0, 0, 0, 0, 0]]
+        self.four_windows: List[set] = [set(), set(), set()]
+
+    def _add_to_windows(self, point: GO_POINT, color: GO_COLOR) -> None:
+        """
+        Update the window counters for a stone of color placed on point.
+        """
+        opp = opponent(color)
+        own_stones = self.window_stones[color]
+        opp_stones = self.window_stones[opp]
+        own_threats = self.window_threats[color]
+        opp_threats = self.window_threats[opp]
+        for w in self.point_windows[point]:
+            n = own_stones[w]
+            m = opp_stones[w]
+            own_stones[w] = n + 1
+            if m == 0:
+                own_threats[n] -= 1
+                own_threats[n + 1] += 1
+                if n == 3:
+                    self.four_windows[color].add(w)
+                elif n == 4:
+                    self.four_windows[color].discard(w)
+            if n == 0:
+                # the window is no longer free for the opponent
+                opp_threats[m] -= 1
+                if m == 4:
+                    self.four_windows[opp].discard(w)
+
+    def _remove_from_windows(self, point: GO_POINT, color: GO_COLOR) -> None:
+        """
+        Update the window counters for a stone of color removed from point.
+        """
+        opp = opponent(color)
+        own_stones = self.window_stones[color]
+        opp_stones = self.window_stones[opp]
+        own_threats = self.window_threats[color]
+        opp_threats = self.window_threats[opp]
+        for w in self.point_windows[point]:
+            n = own_stones[w]
+            m = opp_stones[w]
+            own_stones[w] = n - 1
+            if m == 0:
+                own_threats[n] -= 1
+                own_threats[n - 1] += 1
+                if n == 4:
+                    self.four_windows[color].discard(w)
+                elif n == 5:
+                    self.four_windows[color].add(w)
+            if n == 1:
+                # the window is free for the opponent again
+                opp_threats[m] += 1
+                if m == 4:
+                    self.four_windows[opp].add(w)
+
+    def _run_length(self, ray: Tuple[int, ...], color: GO_COLOR) -> int:
+        """
+        Number of consecutive stones of color along ray.
+        """
+        n = 0
+        for p in ray:
+            if self.board[p] != color:
+                break
+            n += 1
+        return n
+
+    def _add_empty(self, point: GO_POINT) -> None:
+        """
+        Record that the stone on point was removed. board[point] must be EMPTY.
+        """
+        self.empty_list[self.num_empty] = point
+        self.empty_index[point] = self.num_empty
+        self.num_empty += 1
+        self._stone_removed(point)
+
+    def _remove_empty(self, point: GO_POINT) -> None:
+        """
+        Record that a stone was placed on point. board[point] must hold it.
+        """
+        # move the last empty point into the slot of the removed one
+        i = self.empty_index[point]
+        self.num_empty -= 1
+        last = self.empty_list[self.num_empty]
+        self.empty_list[i] = last
+        self.empty_index[last] = i
+        self.empty_index[point] = -1
+        self._stone_added(point)
+
     def play_move(self, point: GO_POINT, color: GO_COLOR) -> bool:
         """
         Tries to play a move of color on the point.
@@ -157,11 +481,15 @@ class GoBoard(object):
         """
         if self.board[point] != EMPTY:
             return False
+        point = int(point)
         self.board[point] = color
+        self._remove_empty(point)
+        self._add_to_windows(point, color)
         self.current_player = opponent(color)
         self.last2_move = self.last_move
         self.last_move = point
         O = opponent(color)
+        h = self._hash ^ ZOBRIST_POINTS[color][point]
         offsets = [1, -1, self.NS, -self.NS, self.NS+1, -(self.NS+1), self.NS-1, -self.NS+1]
         bcs = []
         wcs = []
@@ -169,14 +497,24 @@ class GoBoard(object):
             if self.board[point+offset] == O and self.board[point+(offset*2)] == O and self.board[point+(offset*3)] == color:
                 self.board[point+offset] = EMPTY
                 self.board[point+(offset*2)] = EMPTY
+                self._add_empty(point+offset)
+                self._add_empty(point+(offset*2))
+                self._remove_from_windows(point+offset, O)
+                self._remove_from_windows(point+(offset*2), O)
+                h ^= ZOBRIST_POINTS[O][point+offset] ^ ZOBRIST_POINTS[O][point+(offset*2)]
                 if color == BLACK:
+                    h ^= ZOBRIST_CAPTURES[BLACK][self.black_captures]
                     self.black_captures += 2
+                    h ^= ZOBRIST_CAPTURES[BLACK][self.black_captures]
                     bcs.append(point+offset)
                     bcs.append(point+(offset*2))
                 else:
+                    h ^= ZOBRIST_CAPTURES[WHITE][self.white_captures]
                     self.white_captures += 2
+                    h ^= ZOBRIST_CAPTURES[WHITE][self.white_captures]
                     wcs.append(point+offset)
                     wcs.append(point+(offset*2))
+        self._hash = h
         self.depth += 1
         self.black_capture_history.append(bcs)
         self.white_capture_history.append(wcs)
@@ -184,17 +522,37 @@ class GoBoard(object):
         return True
     
     def undo(self):
-        self.board[self.move_history.pop()] = EMPTY
+        move = self.move_history.pop()
+        color = self.board[move]
+        h = self._hash ^ ZOBRIST_POINTS[color][move]
+        self.board[move] = EMPTY
+        self._add_empty(move)
+        self._remove_from_windows(move, color)
         self.current_player = opponent(self.current_player)
         self.depth -= 1
         bcs = self.black_capture_history.pop()
+        if bcs:
+            h ^= ZOBRIST_CAPTURES[BLACK][self.black_captures]
         for point in bcs:
             self.board[point] = WHITE
+            self._remove_empty(point)
+            self._add_to_windows(point, WHITE)
             self.black_captures -= 1
+            h ^= ZOBRIST_POINTS[WHITE][point]
+        if bcs:
+            h ^= ZOBRIST_CAPTURES[BLACK][self.black_captures]
         wcs = self.white_capture_history.pop()
+        if wcs:
+            h ^= ZOBRIST_CAPTURES[WHITE][self.white_captures]
         for point in wcs:
             self.board[point] = BLACK
+            self._remove_empty(point)
+            self._add_to_windows(point, BLACK)
             self.white_captures -= 1
+            h ^= ZOBRIST_POINTS[BLACK][point]
+        if wcs:
+            h ^= ZOBRIST_CAPTURES[WHITE][self.white_captures]
+        self._hash = h
         if len(self.move_history) > 0:
             self.last_move = self.move_history[-1]
         if len(self.move_history) > 1:
@@ -237,47 +595,26 @@ class GoBoard(object):
         EMPTY otherwise.
         Checks the entire board.
         """
-        for point in range(self.maxpoint):
-            c = self.board[point]
-            if c != BLACK and c != WHITE:
-                continue
-            for offset in [(1, 0), (0, 1), (1, 1), (1, -1)]:
-                i = 1
-                num_found = 1
-                while self.board[point + i * offset[0] * self.NS + i * offset[1]] == c:
-                    i += 1
-                    num_found += 1
-                i = -1
-                while self.board[point + i * offset[0] * self.NS + i * offset[1]] == c:
-                    i -= 1
-                    num_found += 1
-                if num_found >= 5:
-                    return c
-        
+        if self.windows.size == 0:
+            return EMPTY
+        stones = self.board[self.windows]
+        five = (stones == stones[:, :1]).all(axis=1) & (stones[:, 0] != EMPTY)
+        found = where1d(five)
+        if found.size > 0:
+            return GO_COLOR(stones[found[0], 0])
         return EMPTY
     
     def detect_five_in_a_row(self) -> GO_COLOR:
         """
         Returns BLACK or WHITE if any five in a row is detected for the color
         EMPTY otherwise.
-        Only checks around the last move for efficiency.
+        Only checks the color of the last move, using the window counters.
         """
         if self.last_move == NO_POINT or self.last_move == PASS:
             return EMPTY
         c = self.board[self.last_move]
-        for offset in [(1, 0), (0, 1), (1, 1), (1, -1)]:
-            i = 1
-            num_found = 1
-            while self.board[self.last_move + i * offset[0] * self.NS + i * offset[1]] == c:
-                i += 1
-                num_found += 1
-            i = -1
-            while self.board[self.last_move + i * offset[0] * self.NS + i * offset[1]] == c:
-                i -= 1
-                num_found += 1
-            if num_found >= 5:
-                return c
-        
+        if (c == BLACK or c == WHITE) and self.window_threats[c][5] > 0:
+            return c
         return EMPTY
 
     def is_terminal(self):
@@ -297,6 +634,58 @@ class GoBoard(object):
         else:
             return False, EMPTY
 
+    def completion_points(self, color: GO_COLOR) -> List[GO_POINT]:
+        """
+        Returns the empty points where color completes five in a row.
+        """
+        points = set()
+        for w in self.four_windows[color]:
+            for p in self.window_points[w]:
+                if self.board[p] == EMPTY:
+                    points.add(p)
+                    break
+        return sorted(points)
+
+    def threat_summary(self, color: GO_COLOR) -> Tuple[int, int, int]:
+        """
+        Returns the number of windows holding five, four and three stones
+        of color and no opponent stone.
+        """
+        threats = self.window_threats[color]
+        return threats[5], threats[4], threats[3]
+
+    def threat_points(self, color: GO_COLOR, stones: int) -> List[GO_POINT]:
+        """
+        Returns the empty points of the windows holding the given number
+        of stones of color and no opponent stone. For stones == 3 these
+        are the points where color makes a four.
+        """
+        own = self.window_stones[color]
+        opp = self.window_stones[opponent(color)]
+        points = set()
+        for w in range(len(own)):
+            if own[w] == stones and opp[w] == 0:
+                for p in self.window_points[w]:
+                    if self.board[p] == EMPTY:
+                        points.add(p)
+        return sorted(points)
+
+    def capture_points(self, color: GO_COLOR) -> List[GO_POINT]:
+        """
+        Returns the empty points where color captures at least one pair.
+        """
+        O = opponent(color)
+        offsets = [1, -1, self.NS, -self.NS, self.NS+1, -(self.NS+1), self.NS-1, -self.NS+1]
+        board = self.board.tolist()  # list indexing is much faster than numpy's
+        points = set()
+        for point in where1d(self.board == color).tolist():
+            for offset in offsets:
+                if board[point+offset] == O and board[point+(offset*2)] == O:
+                    end = point + 3 * offset
+                    if 0 <= end < self.maxpoint and board[end] == EMPTY:
+                        points.add(end)
+        return sorted(points)
+
     def heuristic_eval(self):
         """
         Returns: a very basic heuristic value of the board
@@ -318,37 +707,35 @@ class GoBoard(object):
         """
         Check if there is an open four of the given color around the specified point.
         """
-        for offset in [(1, 0), (0, 1), (1, 1), (1, -1)]:
-            if self._check_open_four_in_direction(point, offset, color):
+        for direction in range(len(DIRECTIONS)):
+            if self._check_open_four_in_direction(point, direction, color):
                 return True
         return False
 
-    def _check_open_four_in_direction(self, point: GO_POINT, offset: Tuple[int, int], color: GO_COLOR) -> bool:
+    def _check_open_four_in_direction(self, point: GO_POINT, direction: int, color: GO_COLOR) -> bool:
         """
         Helper function to check for an open four in a specific direction.
+        direction is an index into DIRECTIONS.
         """
         c = self.board[point]
+        forward, backward = self.rays[point][direction]
         num_found = 1
         empty_found = 0
 
         # Check in the positive direction
-        i = 1
-        while self.board[point + i * offset[0] * self.NS + i * offset[1]] == c:
-            i += 1
-            num_found += 1
+        i = self._run_length(forward, c)
+        num_found += i
 
         # Check for an open end
-        if self.board[point + i * offset[0] * self.NS + i * offset[1]] == EMPTY:
+        if i < len(forward) and self.board[forward[i]] == EMPTY:
             empty_found += 1
 
         # Check in the negative direction
-        i = -1
-        while self.board[point + i * offset[0] * self.NS + i * offset[1]] == c:
-            i -= 1
-            num_found += 1
+        i = self._run_length(backward, c)
+        num_found += i
 
         # Check for an open end
-        if self.board[point + i * offset[0] * self.NS + i * offset[1]] == EMPTY:
+        if i < len(backward) and self.board[backward[i]] == EMPTY:
             empty_found += 1
 
         # Check if it's an open four
@@ -360,18 +747,11 @@ class GoBoard(object):
         """
         count = 1  # Count the stone at the specified point
         c = self.board[point]
+        forward, backward = self.rays[point][1]
 
-        # Check in the positive direction
-        i = 1
-        while self.board[point + i] == c:
-            i += 1
-            count += 1
-
-        # Check in the negative direction
-        i = -1
-        while self.board[point + i] == c:
-            i -= 1
-            count += 1
+        # Check in the positive and negative direction
+        count += self._run_length(forward, c)
+        count += self._run_length(backward, c)
 
         return count
 
@@ -379,37 +759,35 @@ class GoBoard(object):
         """
         Check if there is an open three of the given color around the specified point.
         """
-        for offset in [(1, 0), (0, 1), (1, 1), (1, -1)]:
-            if self._check_open_three_in_direction(point, offset, color):
+        for direction in range(len(DIRECTIONS)):
+            if self._check_open_three_in_direction(point, direction, color):
                 return True
         return False
 
-    def _check_open_three_in_direction(self, point: GO_POINT, offset: Tuple[int, int], color: GO_COLOR) -> bool:
+    def _check_open_three_in_direction(self, point: GO_POINT, direction: int, color: GO_COLOR) -> bool:
         """
         Helper function to check for an open three in a specific direction.
+        direction is an index into DIRECTIONS.
         """
         c = self.board[point]
+        forward, backward = self.rays[point][direction]
         num_found = 1
         empty_found = 0
 
         # Check in the positive direction
-        i = 1
-        while self.board[point + i * offset[0] * self.NS + i * offset[1]] == c:
-            i += 1
-            num_found += 1
+        i = self._run_length(forward, c)
+        num_found += i
 
         # Check for an open end
-        if self.board[point + i * offset[0] * self.NS + i * offset[1]] == EMPTY:
+        if i < len(forward) and self.board[forward[i]] == EMPTY:
             empty_found += 1
 
         # Check in the negative direction
-        i = -1
-        while self.board[point + i * offset[0] * self.NS + i * offset[1]] == c:
-            i -= 1
-            num_found += 1
+        i = self._run_length(backward, c)
+        num_found += i
 
         # Check for an open end
-        if self.board[point + i * offset[0] * self.NS + i * offset[1]] == EMPTY:
+        if i < len(backward) and self.board[backward[i]] == EMPTY:
             empty_found += 1
 
         # Check if it's an open three
@@ -59,6 +59,20 @@ See the documentation under coord_to_point.
 def board_array_size(size: int) -> int:
     return size * size + 3 * (size + 1)
 
+"""
+Zobrist keys for incremental position hashing.
+There is one random 64-bit key for each (color, point) of the largest board,
+one key for white to play, and one key for each (color, capture count).
+The fixed seed makes hashes identical across runs and processes.
+"""
+ZOBRIST_SEED: int = 455
+_zobrist_rng = random.Random(ZOBRIST_SEED)
+ZOBRIST_POINTS = [[_zobrist_rng.getrandbits(64) for _ in range(board_array_size(MAXSIZE))]
+                  for _ in range(4)]
+ZOBRIST_WHITE_TO_PLAY: int = _zobrist_rng.getrandbits(64)
+ZOBRIST_CAPTURES = [[_zobrist_rng.getrandbits(64) for _ in range(MAXSIZE * MAXSIZE + 1)]
+                    for _ in range(4)]
+
 """
 where1d: Helper function for using np.where with 1-d arrays.
 The result of np.where is a tuple which contains the indices 
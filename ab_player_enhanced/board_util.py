@@ -23,7 +23,7 @@ class GoBoardUtil(object):
         color:
             the color to generate the move for.
         """
-        moves: np.ndarray[GO_POINT] = board.get_empty_points()
+        moves: List[GO_POINT] = board.get_empty_point_list()
         # TODO use generator instead.
         legal_moves: List[GO_POINT] = []
         # TODO use generator instead.
@@ -32,6 +32,19 @@ class GoBoardUtil(object):
                 legal_moves.append(move)
         return legal_moves
 
+    @staticmethod
+    def generate_candidate_moves(board: GoBoard, color: GO_COLOR) -> List:
+        """
+        generate the legal moves near the stones on the board, within
+        board.candidate_distance. Falls back to generate_legal_moves
+        if there are no candidates, e.g. on an empty board.
+        Does not include the Pass move.
+        """
+        moves: List[GO_POINT] = board.get_candidate_list()
+        if not moves:
+            return GoBoardUtil.generate_legal_moves(board, color)
+        return [move for move in moves if board.is_legal(move, color)]
+
     @staticmethod
     def generate_random_move(board: GoBoard, color: GO_COLOR, 
                              use_eye_filter: bool) -> GO_POINT:
@@ -0,0 +1,200 @@
+"""
+capture_search.py
+Capture race search for Ninuki.
+
+A player who has captured 10 stones wins. CaptureSearch looks for a
+forced way for the player to move to get there: the attacker only
+plays moves that capture a pair, or that threaten to capture one by
+making the XOO. pattern, where the empty end is the capture point.
+Since the defender may also ignore a threat, all legal replies are
+searched, with the replies that matter most first: occupying a
+capture point and capturing attacker stones. A win found is a proof.
+
+The functions only use the board array, play_move, undo and
+is_terminal, so they work with every board class of the players.
+
+Both player directories hold an identical copy of this module, as each
+player runs on its own. Keep the copies in sync.
+"""
+
+import numpy as np
+from typing import Dict, List, Tuple
+
+from board_base import (
+    opponent,
+    where1d,
+    EMPTY,
+    NO_POINT,
+    GO_COLOR,
+    GO_POINT,
+)
+from deadline import Deadline
+
+"""
+Captured stones needed to win
+"""
+CAPTURES_TO_WIN = 10
+
+"""
+Maximum number of attacker moves in a capture sequence
+"""
+MAX_MOVES = 3
+
+"""
+Maximum number of nodes of one search
+"""
+MAX_NODES = 20000
+
+"""
+Captures from which a player is in a capture race: one move that
+captures two pairs can win, so the players run the search
+"""
+RACE_CAPTURES = 6
+
+
+def _pair_ends(board, color: GO_COLOR, far: GO_COLOR) -> np.ndarray:
+    """
+    Returns the empty points p for which, in some direction, the next
+    two points hold opponent stones and the third point holds far.
+    """
+    a = board.board
+    n = len(a)
+    O = opponent(color)
+    NS = board.NS
+    found = np.zeros(n, dtype=bool)
+    for offset in (1, -1, NS, -NS, NS + 1, -(NS + 1), NS - 1, -NS + 1):
+        lo = max(0, -3 * offset)
+        hi = min(n, n - 3 * offset)
+        found[lo:hi] |= (a[lo:hi] == EMPTY) \
+            & (a[lo + offset:hi + offset] == O) \
+            & (a[lo + 2 * offset:hi + 2 * offset] == O) \
+            & (a[lo + 3 * offset:hi + 3 * offset] == far)
+    return where1d(found)
+
+
+def capture_points(board, color: GO_COLOR) -> List[GO_POINT]:
+    """
+    Returns the empty points where color captures at least one pair.
+    """
+    return _pair_ends(board, color, color).tolist()
+
+
+def capture_threats(board, color: GO_COLOR) -> List[GO_POINT]:
+    """
+    Returns the empty points where color threatens to capture a pair
+    on the next move.
+    """
+    return _pair_ends(board, color, EMPTY).tolist()
+
+
+def capture_win(board, color: GO_COLOR) -> GO_POINT:
+    """
+    Returns a move that wins for color at once by capturing,
+    or NO_POINT. board is left unchanged.
+    """
+    if CAPTURES_TO_WIN - board.get_captures(color) > 2 * 8:
+        return NO_POINT  # a move captures at most one pair per direction
+    for move in capture_points(board, color):
+        board.play_move(move, color)
+        winner = board.is_terminal()[1]
+        board.undo()
+        if winner == color:
+            return move
+    return NO_POINT
+
+
+class CaptureSearch(object):
+    def __init__(self, board, deadline: Deadline = None, max_nodes: int = MAX_NODES) -> None:
+        """
+        Searches board for a forced capture win of the player to move.
+        The search gives up after max_nodes nodes or at deadline.
+        """
+        self.board = board.copy()
+        self.deadline = deadline
+        self.max_nodes: int = max_nodes
+        self.attacker: GO_COLOR = board.current_player
+        self.nodes: int = 0
+        self.aborted: bool = False
+        # position -> attacker moves searched without a win
+        self.failed: Dict[Tuple, int] = {}
+
+    def find_win(self, max_moves: int = MAX_MOVES) -> GO_POINT:
+        """
+        Returns the first move of a capture win in at most max_moves
+        attacker moves, or NO_POINT if none was found.
+        """
+        return self._attack(max_moves)
+
+    def _out_of_budget(self) -> bool:
+        if self.nodes >= self.max_nodes:
+            self.aborted = True
+        elif self.deadline is not None and self.nodes >= self.deadline.next_poll \
+                and self.deadline.poll(self.nodes):
+            self.aborted = True
+        return self.aborted
+
+    def _attack(self, moves_left: int) -> GO_POINT:
+        """
+        Returns a move that wins for the attacker, who is to play,
+        within moves_left moves, or NO_POINT.
+        """
+        self.nodes += 1
+        board = self.board
+        color = self.attacker
+        move = capture_win(board, color)
+        if move != NO_POINT or moves_left <= 1 or self._out_of_budget():
+            return move
+        # each move captures at most one pair in each of 8 directions
+        if CAPTURES_TO_WIN - board.get_captures(color) > 2 * 8 * moves_left:
+            return NO_POINT
+        key = (board.board.tobytes(), board.black_captures, board.white_captures)
+        if self.failed.get(key, 0) >= moves_left:
+            return NO_POINT
+
+        captures = capture_points(board, color)
+        threats = [move for move in capture_threats(board, color) if move not in captures]
+        for move in captures + threats:
+            board.play_move(move, color)
+            won = self._defend(moves_left - 1)
+            board.undo()
+            if won:
+                return move
+            if self.aborted:
+                return NO_POINT
+        self.failed[key] = moves_left
+        return NO_POINT
+
+    def _defend(self, moves_left: int) -> bool:
+        """
+        Returns whether the attacker wins against every reply
+        of the defender, who is to play.
+        """
+        self.nodes += 1
+        board = self.board
+        is_terminal, winner = board.is_terminal()
+        if is_terminal:
+            return winner == self.attacker
+        color = board.current_player
+        # save the threatened pairs or capture the threatening stones first
+        replies = capture_points(board, self.attacker)
+        replies += [move for move in capture_points(board, color) if move not in replies]
+        replies += [move for move in board.get_empty_points().tolist() if move not in replies]
+        for move in replies:
+            board.play_move(move, color)
+            is_terminal, winner = board.is_terminal()
+            won = winner == self.attacker if is_terminal else self._attack(moves_left) != NO_POINT
+            board.undo()
+            if not won:
+                return False
+        return True
+
+
+def find_capture_win(board, deadline: Deadline = None, max_moves: int = MAX_MOVES,
+                     max_nodes: int = MAX_NODES) -> Tuple[GO_POINT, int]:
+    """
+    Returns a move that wins the capture race for the player to move
+    on board, or NO_POINT, and the number of nodes searched.
+    """
+    search = CaptureSearch(board, deadline, max_nodes)
+    move = search.find_win(max_moves)
+    return move, search.nodes
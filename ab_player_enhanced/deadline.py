@@ -0,0 +1,68 @@
+"""
+deadline.py
+Cheap time limit checks for search loops.
+
+Reading the clock at every node of a search costs a measurable share
+of the time on small boards. A Deadline reads it only every few
+nodes instead: the caller counts its nodes (or simulations) and calls
+poll once the count reaches next_poll. From the node rate measured
+between polls, the next poll is placed about POLL_SECONDS later, so
+the deadline is still noticed within a few milliseconds.
+
+    if nodes >= deadline.next_poll and deadline.poll(nodes):
+        stop the search
+
+Both player directories hold an identical copy of this module, as each
+player runs on its own. Keep the copies in sync.
+"""
+
+import time
+from typing import Optional
+
+"""
+Target time between two clock reads
+"""
+POLL_SECONDS = 0.001
+
+"""
+Upper limit on the number of nodes between two clock reads
+"""
+MAX_POLL_INTERVAL = 10000
+
+
+class Deadline(object):
+    def __init__(self, end_time: float, stop=None) -> None:
+        """
+        end_time: time.time() value at which the deadline is reached
+        stop:     optional shared flag with a value attribute, e.g. a
+                  multiprocessing.RawValue; the deadline is also reached
+                  when another process sets it to a true value
+        """
+        self.end_time: float = end_time
+        self.stop = stop
+        self.expired: bool = False
+        self.next_poll: int = 0
+        self.last_poll: float = time.time()
+        self.last_count: Optional[int] = None
+
+    def poll(self, count: int) -> bool:
+        """
+        Read the clock at node count and return whether the deadline is reached.
+        Sets next_poll, the count at which the caller should poll again.
+        """
+        if self.expired:
+            return True
+        now = time.time()
+        if now >= self.end_time or (self.stop is not None and self.stop.value):
+            self.expired = True
+            self.next_poll = count
+            return True
+        if self.last_count is not None and count > self.last_count and now > self.last_poll:
+            rate = (count - self.last_count) / (now - self.last_poll)
+            interval = int(rate * min(POLL_SECONDS, self.end_time - now))
+        else:
+            interval = 1  # no rate measured yet
+        self.next_poll = count + max(1, min(interval, MAX_POLL_INTERVAL))
+        self.last_poll = now
+        self.last_count = count
+        return False
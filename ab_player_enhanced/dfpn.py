@@ -0,0 +1,270 @@
+"""
+dfpn.py
+Depth-first proof-number search (df-pn) for exact solving.
+
+Proof-number search proves or disproves that a fixed attacker wins.
+Every node has a proof number pn, the least number of leaves that must
+be proven to prove it, and a disproof number dn, the least number to
+disprove it. The search always expands the most-proving node, so the
+effort goes to the easiest proof, unlike iterative deepening, which
+searches every move to the same depth.
+
+df-pn finds the most-proving node depth first with thresholds on pn
+and dn, and keeps the numbers of the nodes in a ProofTable instead of
+a tree. The numbers are stored as (phi, delta) from the point of view
+of the player to move: (pn, dn) where the attacker is to move, (dn, pn)
+where the defender is. Then phi = min(child delta) and
+delta = sum(child phi) for both kinds of nodes.
+
+A result "attacker does not win" includes draws, so telling wins,
+draws and losses apart takes a search for each color as attacker.
+
+The 1 + epsilon trick of Pawlewicz and Lew lets a child search a bit
+past the second best sibling, which saves many re-expansions.
+"""
+
+import numpy as np
+from typing import List, Optional, Tuple
+
+from board_base import (
+    opponent,
+    BLACK,
+    NO_POINT,
+    GO_COLOR,
+    GO_POINT,
+    ZOBRIST_POINTS,
+    ZOBRIST_WHITE_TO_PLAY,
+)
+from board import GoBoard
+from board_util import GoBoardUtil
+from deadline import Deadline
+
+"""
+Proof and disproof number of a proven or disproven node
+"""
+INF = 10 ** 9
+
+"""
+(phi, delta) of a position won and lost by the player to move
+"""
+WON = (0, INF)
+LOST = (INF, 0)
+
+"""
+Child thresholds may exceed the second best sibling by this fraction
+"""
+EPSILON = 0.25
+
+"""
+Bytes used per slot: key (8), phi (4), delta (4) and work (4)
+"""
+ENTRY_BYTES = 20
+
+
+class ProofTable(object):
+    def __init__(self, size_mb: float = 16) -> None:
+        """
+        Creates a table for (phi, delta) using at most size_mb megabytes,
+        in buckets of two slots. Storing into a full bucket replaces
+        the entry with the smaller search effort.
+        """
+        num_buckets = 1
+        while 2 * num_buckets * 2 * ENTRY_BYTES <= size_mb * 1024 * 1024:
+            num_buckets *= 2
+        self.mask: int = num_buckets - 1
+        slots = 2 * num_buckets
+        self.keys: np.ndarray = np.zeros(slots, dtype=np.uint64)
+        self.phi: np.ndarray = np.zeros(slots, dtype=np.uint32)
+        self.delta: np.ndarray = np.zeros(slots, dtype=np.uint32)
+        # nodes searched below the entry, 0 for an empty slot
+        self.work: np.ndarray = np.zeros(slots, dtype=np.uint32)
+        self.entries = 0
+
+    def clear(self) -> None:
+        self.keys.fill(0)
+        self.phi.fill(0)
+        self.delta.fill(0)
+        self.work.fill(0)
+        self.entries = 0
+
+    def _find(self, key: int) -> int:
+        slot = (key & self.mask) << 1
+        if self.work[slot] and int(self.keys[slot]) == key:
+            return slot
+        if self.work[slot + 1] and int(self.keys[slot + 1]) == key:
+            return slot + 1
+        return -1
+
+    def probe(self, key: int) -> Optional[Tuple[int, int]]:
+        """
+        Returns (phi, delta) for key, or None if it is not in the table.
+        """
+        i = self._find(key)
+        if i < 0:
+            return None
+        return int(self.phi[i]), int(self.delta[i])
+
+    def store(self, key: int, phi: int, delta: int, work: int) -> None:
+        i = self._find(key)
+        if i < 0:
+            slot = (key & self.mask) << 1
+            i = slot if self.work[slot] <= self.work[slot + 1] else slot + 1
+            if not self.work[i]:
+                self.entries += 1
+        self.keys[i] = key
+        self.phi[i] = phi
+        self.delta[i] = delta
+        self.work[i] = min(work, 0xFFFFFFFF)
+
+
+class DfpnSolver(object):
+    def __init__(self, table: ProofTable, deadline: Deadline) -> None:
+        """
+        A solver that keeps its numbers in table and stops at deadline.
+        nodes counts the searched positions.
+        """
+        self.table = table
+        self.deadline = deadline
+        self.nodes: int = 0
+        self.attacker: GO_COLOR = BLACK
+        self.board: GoBoard = None
+
+    def prove(self, board: GoBoard, attacker: GO_COLOR) -> Tuple[int, int]:
+        """
+        Search whether attacker wins on board, until proven, disproven
+        or the deadline. Returns the (pn, dn) of the root: pn == 0 for
+        a proof, dn == 0 for a disproof.
+        """
+        self.board = board.copy()
+        self.attacker = attacker
+        self.table.clear()
+        key = self.board.hash
+        self._mid(key, INF - 1, INF - 1)
+        phi, delta = self.table.probe(key) or (1, 1)
+        if board.current_player == attacker:
+            return phi, delta
+        return delta, phi
+
+    def _children(self) -> Tuple[List[GO_POINT], List[int], List[Optional[Tuple[int, int]]]]:
+        """
+        Returns the moves of the player to move, the hash of the position
+        after each move, and the fixed (phi, delta) of the children whose
+        result is known at once, None for the others.
+        If the player to move can complete five, only that move is listed.
+        If the opponent can, only the blocks and the captures are, since
+        every other move loses.
+        Only captures and moves that may end the game are played out;
+        for the others the child hash and result follow from the move.
+        """
+        board = self.board
+        color = board.current_player
+        wins = board.completion_points(color)
+        blocks = board.completion_points(opponent(color))
+        captures = board.capture_points(color)
+        if wins:
+            moves = wins[:1]
+        elif blocks:
+            moves = blocks + [move for move in captures if move not in blocks]
+        else:
+            moves = GoBoardUtil.generate_legal_moves(board, color)
+        played = set(captures)
+        if wins or board.num_empty <= 1:
+            played.update(moves)
+        key = board.hash ^ ZOBRIST_WHITE_TO_PLAY
+        keys = []
+        known = []
+        for move in moves:
+            if move in played:
+                board.play_move(move, color)
+                keys.append(board.hash)
+                known.append(self._evaluate())
+                board.undo()
+            else:
+                keys.append(key ^ ZOBRIST_POINTS[color][move])
+                # the opponent completes five unless move blocked the only point
+                if len(blocks) > 1 or blocks and blocks[0] != move:
+                    known.append(WON)
+                else:
+                    known.append(None)
+        return moves, keys, known
+
+    def _evaluate(self) -> Optional[Tuple[int, int]]:
+        """
+        Returns the (phi, delta) of the current position if its result
+        is known without search: it is over, or the player to move can
+        complete five. None otherwise.
+        """
+        board = self.board
+        is_terminal, winner = board.is_terminal()
+        if not is_terminal:
+            if not board.completion_points(board.current_player):
+                return None
+            return WON
+        # a draw counts as a defender win
+        if (winner == self.attacker) == (board.current_player == self.attacker):
+            return WON
+        return LOST
+
+    def _mid(self, key: int, th_phi: int, th_delta: int) -> None:
+        """
+        Search the current position until its phi reaches th_phi or its
+        delta reaches th_delta, or the deadline, and store the result.
+        """
+        self.nodes += 1
+        if self.nodes >= self.deadline.next_poll and self.deadline.poll(self.nodes):
+            return
+        start_nodes = self.nodes
+        known = self._evaluate()
+        if known is not None:
+            self.table.store(key, known[0], known[1], 1)
+            return
+        moves, keys, fixed = self._children()
+        board = self.board
+        color = board.current_player
+        while True:
+            # phi = min(child delta), delta = sum(child phi)
+            phi = INF
+            delta = 0
+            best = -1
+            best_delta = second_delta = INF
+            best_phi = 0
+            for i in range(len(moves)):
+                child = fixed[i] or self.table.probe(keys[i]) or (1, 1)
+                c_phi, c_delta = child
+                if c_phi >= INF or delta >= INF:
+                    delta = INF
+                else:
+                    delta = min(INF - 1, delta + c_phi)
+                if c_delta < best_delta:
+                    second_delta = best_delta
+                    best_delta = c_delta
+                    best_phi = c_phi
+                    best = i
+                elif c_delta < second_delta:
+                    second_delta = c_delta
+                phi = min(phi, c_delta)
+            if phi >= th_phi or delta >= th_delta or self.deadline.expired:
+                break
+            child_th_delta = min(th_phi, int(second_delta * (1 + EPSILON)) + 1)
+            child_th_phi = th_delta - delta + best_phi
+            board.play_move(moves[best], color)
+            self._mid(keys[best], child_th_phi, child_th_delta)
+            board.undo()
+        if not moves:
+            phi, delta = INF, 0  # no move: cannot happen before the board is full
+        self.table.store(key, phi, delta, self.nodes - start_nodes + 1)
+
+    def proof_move(self) -> GO_POINT:
+        """
+        Returns the root move with the smallest child delta after a search:
+        a winning move after a proof with the attacker to move, a move
+        that does not lose after a disproof with the defender to move.
+        """
+        moves, keys, fixed = self._children()
+        best = NO_POINT
+        best_delta = INF + 1
+        for move, key, known in zip(moves, keys, fixed):
+            child = known or self.table.probe(key) or (1, 1)
+            if child[1] < best_delta:
+                best, best_delta = move, child[1]
+        return best
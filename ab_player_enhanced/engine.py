@@ -1,3 +1,4 @@
+from typing import Any, Dict
 from board_base import GO_POINT, NO_POINT
 from board import GoBoard
 
@@ -12,6 +13,8 @@ class GoEngine:
         self.name: str = name
         self.version: float = version
         self.komi: float = DEFAULT_KOMI
+        # engine specific settings, changed through the setoption GTP command
+        self.options: Dict[str, Any] = {}
 
     def get_move(self, board: GoBoard, color: int) -> GO_POINT:
         """
@@ -19,4 +22,31 @@ class GoEngine:
         version : version number used by the GTP interface
         """
         pass
-        
\ No newline at end of file
+
+    def reset(self) -> None:
+        """
+        Called when the game is restarted on a cleared board.
+        """
+        pass
+
+    def search_stats(self) -> str:
+        """
+        Statistics of the last search, reported by the stats GTP command.
+        """
+        return ""
+
+    def set_option(self, name: str, value: str) -> None:
+        """
+        Set option name from its string value.
+        The value is converted to the type of the option's default.
+        Raises ValueError for unknown options or bad values.
+        """
+        if name not in self.options:
+            raise ValueError("unknown option {}".format(name))
+        default = self.options[name]
+        if isinstance(default, bool):
+            if value.lower() not in ("true", "false", "1", "0", "on", "off"):
+                raise ValueError("expected a boolean for {}".format(name))
+            self.options[name] = value.lower() in ("true", "1", "on")
+        else:
+            self.options[name] = type(default)(value)
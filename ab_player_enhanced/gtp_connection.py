@@ -73,7 +73,11 @@ class GtpConnection:
             "gogui-rules_board": self.gogui_rules_board_cmd,
             "gogui-analyze_commands": self.gogui_analyze_cmd,
             "timelimit": self.timelimit_cmd,
-            "solve": self.solve_cmd
+            "time_settings": self.time_settings_cmd,
+            "time_left": self.time_left_cmd,
+            "solve": self.solve_cmd,
+            "setoption": self.setoption_cmd,
+            "stats": self.stats_cmd
         }
 
         # argmap is used for argument checking
@@ -85,7 +89,10 @@ class GtpConnection:
             "known_command": (1, "Usage: known_command CMD_NAME"),
             "genmove": (1, "Usage: genmove {w,b}"),
             "play": (2, "Usage: play {b,w} MOVE"),
+            "time_settings": (3, "Usage: time_settings MAIN_TIME BYO_YOMI_TIME BYO_YOMI_STONES"),
+            "time_left": (3, "Usage: time_left {b,w} TIME STONES"),
             "legal_moves": (1, "Usage: legal_moves {w,b}"),
+            "setoption": (2, "Usage: setoption NAME VALUE"),
         }
 
     def write(self, data: str) -> None:
@@ -166,6 +173,7 @@ class GtpConnection:
         Reset the board to empty board of given size
         """
         self.board.reset(size)
+        self.engine.reset()
 
     def board2d(self) -> str:
         return str(GoBoardUtil.get_twoD_board(self.board))
@@ -368,14 +376,49 @@ class GtpConnection:
         self.engine.set_time_limit(int(args[0]))
         self.respond()
 
+    def time_settings_cmd(self, args: List[str]) -> None:
+        """ Set the game clock: main time, then byo-yomi time per period of stones """
+        try:
+            self.engine.set_time_settings(float(args[0]), float(args[1]), int(args[2]))
+        except ValueError:
+            self.error("Usage: time_settings MAIN_TIME BYO_YOMI_TIME BYO_YOMI_STONES")
+            return
+        self.respond()
+
+    def time_left_cmd(self, args: List[str]) -> None:
+        """ Set the time left on the clock of a color """
+        color = args[0].lower()
+        if color not in ['b', 'w']:
+            self.error("Usage: time_left {b,w} TIME STONES")
+            return
+        try:
+            self.engine.set_time_left(color_to_int(color), float(args[1]), int(args[2]))
+        except ValueError:
+            self.error("Usage: time_left {b,w} TIME STONES")
+            return
+        self.respond()
+
     def solve_cmd(self, args: List[str]) -> None:
         """ Implement this function for Assignment 2 """
-        winner, winning_move = self.engine.solve_board(self.board)
+        winner, winning_move = self.engine.solve(self.board)
         if winning_move is None:
             self.respond(winner)
         else:
             self.respond(winner + " " + winning_move)
 
+    def setoption_cmd(self, args: List[str]) -> None:
+        """ Set engine option args[0] to value args[1] """
+        try:
+            self.engine.set_option(args[0], args[1])
+        except ValueError as e:
+            self.error(str(e))
+            return
+        self.respond()
+
+    def stats_cmd(self, args: List[str]) -> None:
+        """ Report the search statistics of the last genmove or solve """
+        self.respond("\n" + self.engine.search_stats())
+
 def point_to_coord(point: GO_POINT, boardsize: int) -> Tuple[int, int]:
     """
     Transform point given as board array index 
@@ -0,0 +1,103 @@
+"""
+move_picker.py
+Staged move generation for the alpha-beta search of ABPlayer.
+
+MovePicker yields the moves of a position in search order, and
+computes each group of moves only when the search reaches it:
+    1. the hash moves: the transposition table move, and at the root
+       the best move of the previous iteration
+    2. a move that completes five, which ends the list
+    3. blocks of the opponent's fours
+    4. captures
+    5. the killer moves of the ply
+    6. all other moves, by history score
+After a beta cutoff on an early move, the later groups are never
+generated, so the cutoff costs almost no move generation.
+The moves of the last group are quiet when the opponent has no four,
+see MovePicker.quiet.
+"""
+
+import random
+from typing import Iterator, List, Optional
+
+from board_base import opponent, GO_POINT
+from board import GoBoard
+from board_util import GoBoardUtil
+
+
+class MovePicker(object):
+    def __init__(self, board: GoBoard, hash_moves: List[GO_POINT], killers: List[GO_POINT],
+                 history: Optional[List[int]], candidate_distance: int, shuffle: bool) -> None:
+        """
+        board:              the position, restored by the caller before
+                            each next move is requested
+        hash_moves:         moves to try first, NO_POINT entries and
+                            points outside the board are skipped
+        killers:            killer moves of the ply
+        history:            history scores of the player to move by point,
+                            None to keep the generated order
+        candidate_distance: see GoBoardUtil.generate_candidate_moves,
+                            0 for all legal moves
+        shuffle:            shuffle the other moves before sorting them
+        """
+        self.board = board
+        self.hash_moves = hash_moves
+        self.killers = killers
+        self.history = history
+        self.candidate_distance = candidate_distance
+        self.shuffle = shuffle
+        # False if moves far from the stones were left out,
+        # known once all moves have been yielded
+        self.complete: bool = True
+        # True while the moves of the last group are yielded and the
+        # opponent has no four to block: the move is no hash move, win,
+        # block, capture or killer, so the search may prune or reduce it
+        self.quiet: bool = False
+
+    def __iter__(self) -> Iterator[GO_POINT]:
+        board = self.board
+        color = board.current_player
+        done = set()
+        for move in self.hash_moves:
+            # a hash move may come from another position with the same key
+            if 0 <= move < board.maxpoint and move not in done and board.is_legal(move, color):
+                done.add(move)
+                yield move
+
+        wins = board.completion_points(color)
+        if wins:
+            # completing five wins at once, nothing else needs a search
+            if not done.intersection(wins):
+                yield wins[0]
+            return
+
+        blocks = board.completion_points(opponent(color))
+        for move in blocks:
+            if move not in done:
+                done.add(move)
+                yield move
+
+        for move in board.capture_points(color):
+            if move not in done:
+                done.add(move)
+                yield move
+
+        for move in list(self.killers):
+            if move not in done and board.is_legal(move, color):
+                done.add(move)
+                yield move
+
+        if self.candidate_distance == 0:
+            moves = GoBoardUtil.generate_legal_moves(board, color)
+        else:
+            moves = GoBoardUtil.generate_candidate_moves(board, color)
+            self.complete = len(moves) >= board.num_empty
+        if self.shuffle:
+            random.shuffle(moves)
+        if self.history is not None:
+            history = self.history
+            moves.sort(key=lambda move: -history[move])
+        self.quiet = not blocks
+        for move in moves:
+            if move not in done:
+                yield move
@@ -0,0 +1,75 @@
+"""
+test_board.py
+Tests that BitBoard and GoBoard agree on every position.
+Run from this directory with: python -m unittest test_board
+"""
+
+import random
+import unittest
+
+from board_base import BLACK, WHITE, EMPTY, opponent, coord_to_point
+from board import GoBoard
+from bitboard import BitBoard
+
+
+def state(board):
+    return (board.board.tolist(), board.current_player, board.black_captures,
+            board.white_captures, board.last_move, board.last2_move, board.hash,
+            sorted(board.get_empty_point_list()), board.is_terminal(),
+            [sorted(board.completion_points(color)) for color in (BLACK, WHITE)],
+            [board.threat_summary(color) for color in (BLACK, WHITE)])
+
+
+class BoardEquivalenceTest(unittest.TestCase):
+    def assertSameState(self, go_board, bit_board):
+        self.assertEqual(state(go_board), state(bit_board))
+
+    def test_capture_and_undo(self):
+        go_board, bit_board = GoBoard(7), BitBoard(7)
+        before = []
+        for row, col, color in [(1, 1, BLACK), (1, 2, WHITE), (1, 3, WHITE), (1, 4, BLACK)]:
+            for board in (go_board, bit_board):
+                board.play_move(coord_to_point(row, col, 7), color)
+            before.append(state(go_board))
+        self.assertEqual(go_board.black_captures, 2)
+        self.assertEqual(go_board.get_color(coord_to_point(1, 2, 7)), EMPTY)
+        self.assertSameState(go_board, bit_board)
+        for board in (go_board, bit_board):
+            board.undo()
+        self.assertEqual(state(bit_board), before[2])
+        self.assertSameState(go_board, bit_board)
+
+    def test_random_games(self):
+        rng = random.Random(1)
+        for size in (5, 7, 9, 19):
+            for _ in range(10 if size < 19 else 2):
+                go_board, bit_board = GoBoard(size), BitBoard(size)
+                while not go_board.is_terminal()[0]:
+                    if go_board.move_history and rng.random() < 0.2:
+                        go_board.undo()
+                        bit_board.undo()
+                    else:
+                        move = rng.choice(go_board.get_empty_point_list())
+                        color = go_board.current_player
+                        self.assertTrue(go_board.play_move(move, color))
+                        self.assertTrue(bit_board.play_move(move, color))
+                    self.assertSameState(go_board, bit_board)
+                    if rng.random() < 0.1:
+                        go_board, bit_board = go_board.copy(), bit_board.copy()
+                        self.assertSameState(go_board, bit_board)
+
+    def test_copy_is_independent(self):
+        for board_class in (GoBoard, BitBoard):
+            board = board_class(7)
+            board.play_move(coord_to_point(4, 4, 7), BLACK)
+            before = state(board)
+            copy = board.copy()
+            copy.play_move(coord_to_point(4, 5, 7), WHITE)
+            copy.undo()
+            copy.undo()
+            copy.play_move(coord_to_point(1, 1, 7), opponent(BLACK))
+            self.assertEqual(state(board), before, board_class.__name__)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+"""
+test_dfpn.py
+Tests that the df-pn solver agrees with the alpha-beta solver.
+Run from this directory with: python -m unittest test_dfpn
+"""
+
+import random
+import unittest
+
+from board_base import BLACK, WHITE, coord_to_point
+from board import GoBoard
+from Ninuki import ABPlayer
+
+
+def random_positions(rng, size, num_positions, max_empty):
+    """
+    Returns non-terminal positions of random games with at most
+    max_empty empty points.
+    """
+    positions = []
+    while len(positions) < num_positions:
+        board = GoBoard(size)
+        while board.num_empty > max_empty and not board.is_terminal()[0]:
+            board.play_move(rng.choice(board.get_empty_points().tolist()), board.current_player)
+        if not board.is_terminal()[0]:
+            positions.append(board)
+    return positions
+
+
+def solver(name):
+    player = ABPlayer()
+    player.set_time_limit(30)
+    player.options["solver"] = name
+    # compare the two full searches, not the shared fast path
+    player.options["threat_search"] = False
+    player.options["capture_search"] = False
+    return player
+
+
+class DfpnTest(unittest.TestCase):
+    def test_agrees_with_alphabeta(self):
+        alphabeta = solver("alphabeta")
+        dfpn = solver("dfpn")
+        for board in random_positions(random.Random(5), 5, 10, 6):
+            expected = alphabeta.solve(board)
+            result = dfpn.solve(board)
+            self.assertNotEqual(expected[0], "unknown")
+            self.assertEqual(result[0], expected[0])
+            to_play = "b" if board.current_player == BLACK else "w"
+            if result[0] == to_play:
+                # the proof move must win: the opponent loses after it
+                board.play_move(dfpn.best_move, board.current_player)
+                self.assertEqual(alphabeta.solve(board)[0], to_play)
+
+    def test_game_over(self):
+        """
+        Black has five in a row. White's four must not count as a
+        win found by the threat search.
+        """
+        board = GoBoard(7)
+        for col in range(1, 5):
+            board.play_move(coord_to_point(3, col, 7), WHITE)
+            board.play_move(coord_to_point(1, col, 7), BLACK)
+        board.play_move(coord_to_point(1, 5, 7), BLACK)
+        for name in ("alphabeta", "dfpn"):
+            player = solver(name)
+            player.options["threat_search"] = True
+            self.assertEqual(player.solve(board), ("b", None))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+"""
+test_move_picker.py
+Tests that MovePicker yields every move at most once, and only legal ones.
+Run from this directory with: python -m unittest test_move_picker
+"""
+
+import random
+import unittest
+
+from board_base import NO_POINT
+from board import GoBoard
+from bitboard import BitBoard
+from board_util import GoBoardUtil
+from move_picker import MovePicker
+
+
+def random_positions(rng, board_class, size, num_positions, max_moves):
+    positions = []
+    while len(positions) < num_positions:
+        board = board_class(size)
+        for _ in range(rng.randrange(max_moves)):
+            if board.is_terminal()[0]:
+                break
+            board.play_move(rng.choice(board.get_empty_points().tolist()), board.current_player)
+        if not board.is_terminal()[0]:
+            positions.append(board)
+    return positions
+
+
+def random_points(rng, board, n, limit):
+    """
+    Returns n points below limit that may be empty, occupied, on the
+    border or NO_POINT, with repeats.
+    """
+    points = [rng.randrange(-1, limit) for _ in range(n)]
+    return points + points[:2] + [NO_POINT]
+
+
+class MovePickerTest(unittest.TestCase):
+    def check(self, board_class, candidate_distance):
+        rng = random.Random(6)
+        for board in random_positions(rng, board_class, 9, 100, 40):
+            board.set_candidate_distance(candidate_distance)
+            color = board.current_player
+            history = [rng.randrange(100) for _ in range(board.maxpoint)]
+            # hash moves may come from another position with the same key, even
+            # from a larger board, killers are moves played on this board
+            hash_moves = random_points(rng, board, 4, board.maxpoint + 20)
+            killers = random_points(rng, board, 3, board.maxpoint)
+            picker = MovePicker(board, hash_moves, killers, history, candidate_distance, True)
+            moves = list(picker)
+            self.assertEqual(len(moves), len(set(moves)))
+            legal = set(GoBoardUtil.generate_legal_moves(board, color))
+            self.assertTrue(set(moves) <= legal)
+            wins = board.completion_points(color)
+            if wins:
+                # only the hash moves and one winning move are needed
+                hash_legal = list(dict.fromkeys(move for move in hash_moves if move in legal))
+                self.assertEqual(moves[:len(hash_legal)], hash_legal)
+                self.assertLessEqual(len(moves), len(hash_legal) + 1)
+                self.assertTrue(set(moves) & set(wins))
+            elif candidate_distance == 0:
+                self.assertEqual(set(moves), legal)
+
+    def test_all_moves(self):
+        for board_class in (GoBoard, BitBoard):
+            self.check(board_class, 0)
+
+    def test_candidate_moves(self):
+        for board_class in (GoBoard, BitBoard):
+            self.check(board_class, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,38 @@
+"""
+test_threat_search.py
+Regression tests for the threat search.
+Run from this directory with: python -m unittest test_threat_search
+"""
+
+import unittest
+
+from board_base import BLACK, WHITE, NO_POINT, coord_to_point
+from board import GoBoard
+from bitboard import BitBoard
+from threat_search import find_forced_win
+
+
+def point(board, name):
+    return coord_to_point(int(name[1:]), ord(name[0]) - ord("a") + 1, board.size)
+
+
+class ThreatSearchTest(unittest.TestCase):
+    def test_capture_reply_ends_the_game(self):
+        """
+        Black's d1 makes two fours, but white answers with a6, which
+        captures a4 a5 and wins with 10 captures.
+        """
+        for board_class in (GoBoard, BitBoard):
+            board = board_class(7)
+            for name in "a1 b1 c1 d2 d3 d4 a4 a5".split():
+                board.play_move(point(board, name), BLACK)
+            board.play_move(point(board, "a3"), WHITE)
+            for _ in range(4):
+                board.add_two_captures(WHITE)
+            board.current_player = BLACK
+            move, _ = find_forced_win(board, None, max_threes=1)
+            self.assertEqual(move, NO_POINT, board_class.__name__)
+
+
+if __name__ == "__main__":
+    unittest.main()
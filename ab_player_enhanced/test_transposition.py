@@ -0,0 +1,67 @@
+"""
+test_transposition.py
+Tests for the transposition table.
+Run from this directory with: python -m unittest test_transposition
+"""
+
+import unittest
+
+from board_base import NO_POINT
+from transposition import TranspositionTable, EXACT, LOWER, UPPER, SOLVED_DEPTH
+
+
+class TranspositionTableTest(unittest.TestCase):
+    def setUp(self):
+        self.tt = TranspositionTable(0.001)
+        # keys 1, 1 + n, 1 + 2 * n share a bucket
+        self.n = self.tt.mask + 1
+
+    def test_store_and_probe(self):
+        self.tt.store(12345, 3, LOWER, 250, 17, False)
+        self.assertEqual(self.tt.probe(12345), (3, LOWER, 250, 17, False))
+        self.assertEqual(self.tt.best_move(12345), 17)
+        self.assertIsNone(self.tt.probe(54321))
+        self.assertEqual(self.tt.best_move(54321), NO_POINT)
+
+    def test_same_position_is_replaced(self):
+        self.tt.store(77, 5, LOWER, 100, 17, False)
+        self.tt.store(77, 2, UPPER, -100, 23, False)
+        self.assertEqual(self.tt.probe(77), (2, UPPER, -100, 23, False))
+
+    def test_solved_entry_has_solved_depth(self):
+        self.tt.store(77, 2, EXACT, 0, NO_POINT, True)
+        self.assertEqual(self.tt.probe(77), (SOLVED_DEPTH, EXACT, 0, NO_POINT, True))
+
+    def test_shallow_entry_goes_to_always_replace_slot(self):
+        self.tt.store(1, 6, EXACT, 10, 17, False)
+        self.tt.store(1 + self.n, 2, EXACT, 20, 18, False)
+        self.tt.store(1 + 2 * self.n, 1, EXACT, 30, 19, False)
+        # the deep entry stays, the second shallow one replaces the first
+        self.assertEqual(self.tt.probe(1), (6, EXACT, 10, 17, False))
+        self.assertIsNone(self.tt.probe(1 + self.n))
+        self.assertEqual(self.tt.probe(1 + 2 * self.n), (1, EXACT, 30, 19, False))
+
+    def test_deep_entry_moves_old_entry_down(self):
+        self.tt.store(1, 2, EXACT, 10, 17, False)
+        self.tt.store(1 + self.n, 1, EXACT, 20, 18, False)
+        self.tt.store(1 + 2 * self.n, 4, EXACT, 30, 19, False)
+        # the displaced depth 2 entry replaces the depth 1 entry
+        self.assertEqual(self.tt.probe(1 + 2 * self.n), (4, EXACT, 30, 19, False))
+        self.assertEqual(self.tt.probe(1), (2, EXACT, 10, 17, False))
+        self.assertIsNone(self.tt.probe(1 + self.n))
+
+    def test_other_buckets_are_unchanged(self):
+        self.tt.store(1, 6, EXACT, 10, 17, False)
+        self.tt.store(2, 1, EXACT, 20, 18, False)
+        self.tt.store(1 + self.n, 2, EXACT, 30, 19, False)
+        self.tt.store(1 + 2 * self.n, 1, EXACT, 40, 20, False)
+        self.assertEqual(self.tt.probe(2), (1, EXACT, 20, 18, False))
+
+    def test_clear(self):
+        self.tt.store(12345, 3, EXACT, 0, 17, False)
+        self.tt.clear()
+        self.assertIsNone(self.tt.probe(12345))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,167 @@
+"""
+threat_search.py
+Threat-space search for forced wins in Ninuki.
+
+A victory by continuous fours (VCF) is a sequence of attacker moves
+that each make a four, a threat to complete five in a row at once.
+A four has to be answered, and the only answers are the points that
+complete it and the defender's captures, which can remove stones of
+the four. So the search tree is narrow, even where the win is too
+deep for the full-width alpha-beta search.
+
+A victory by continuous threats (VCT) also allows the attacker moves
+that make an open three, which threatens an open four. A three leaves
+the defender more choice, so all legal replies are searched; the
+number of threes in a sequence is limited to keep the search small.
+
+The replies searched are all the defender's moves that can matter,
+so a win found by ThreatSearch is a proof.
+"""
+
+from typing import Dict, List, Tuple
+
+from board_base import (
+    NO_POINT,
+    GO_COLOR,
+    GO_POINT,
+)
+from board import GoBoard
+from capture_search import RACE_CAPTURES
+from deadline import Deadline
+
+"""
+Maximum number of attacker moves in a threat sequence
+"""
+MAX_THREATS = 12
+
+"""
+Maximum number of nodes of one search
+"""
+MAX_NODES = 200000
+
+
+class ThreatSearch(object):
+    def __init__(self, board: GoBoard, deadline: Deadline = None, max_nodes: int = MAX_NODES) -> None:
+        """
+        Searches board for a forced win of the player to move.
+        The search gives up after max_nodes nodes or at deadline.
+        """
+        self.board: GoBoard = board.copy()
+        self.deadline = deadline
+        self.max_nodes: int = max_nodes
+        self.attacker: GO_COLOR = board.current_player
+        self.nodes: int = 0
+        self.aborted: bool = False
+        # hash -> (threats, threes) of the attacker nodes searched without a win
+        self.failed: Dict[int, Tuple[int, int]] = {}
+
+    def find_win(self, max_threes: int = 0, max_threats: int = MAX_THREATS) -> GO_POINT:
+        """
+        Returns a winning move of a sequence of at most max_threats
+        fours and threes, at most max_threes of them threes, or NO_POINT
+        if none was found. max_threes = 0 is a VCF search.
+        """
+        return self._attack(max_threats, max_threes)
+
+    def _out_of_budget(self) -> bool:
+        if self.nodes >= self.max_nodes:
+            self.aborted = True
+        elif self.deadline is not None and self.nodes >= self.deadline.next_poll \
+                and self.deadline.poll(self.nodes):
+            self.aborted = True
+        return self.aborted
+
+    def _threats(self, color: GO_COLOR, threes: int) -> List[Tuple[GO_POINT, bool]]:
+        """
+        Returns the (move, makes a four) pairs of the candidate threat
+        moves of color: fours first, then possible threes if allowed.
+        """
+        fours = self.board.threat_points(color, 3)
+        moves = [(move, True) for move in fours]
+        if threes > 0:
+            moves += [(move, False) for move in self.board.threat_points(color, 2)
+                      if move not in fours]
+        return moves
+
+    def _attack(self, threats: int, threes: int) -> GO_POINT:
+        """
+        Returns a move that wins for the attacker, who is to play,
+        with at most threats more threat moves, or NO_POINT.
+        """
+        self.nodes += 1
+        board = self.board
+        color = board.current_player
+        wins = board.completion_points(color)
+        if wins:
+            return wins[0]
+        if board.get_captures(color) >= RACE_CAPTURES:
+            for move in board.capture_points(color):
+                board.play_move(move, color)
+                winner = board.is_terminal()[1]
+                board.undo()
+                if winner == color:
+                    return move
+        if threats == 0 or self._out_of_budget():
+            return NO_POINT
+        key = board.hash
+        searched = self.failed.get(key)
+        if searched is not None and searched[0] >= threats and searched[1] >= threes:
+            return NO_POINT
+
+        for move, is_four in self._threats(color, threes):
+            board.play_move(move, color)
+            if not is_four and not board.detect_open_threes(move, color):
+                board.undo()
+                continue
+            won = self._defend(threats - 1, threes if is_four else threes - 1)
+            board.undo()
+            if won:
+                return move
+            if self.aborted:
+                return NO_POINT
+        self.failed[key] = (threats, threes)
+        return NO_POINT
+
+    def _defend(self, threats: int, threes: int) -> bool:
+        """
+        Returns whether the attacker wins against every reply
+        of the defender, who is to play.
+        """
+        self.nodes += 1
+        board = self.board
+        is_terminal, winner = board.is_terminal()
+        if is_terminal:
+            return winner == self.attacker
+        color = board.current_player
+        if board.completion_points(color):
+            return False  # the defender completes five first
+        fours = board.completion_points(self.attacker)
+        if fours:
+            # block the four or capture stones out of it
+            replies = fours + [move for move in board.capture_points(color) if move not in fours]
+        else:
+            # answer to a three: try the likely defenses first
+            near = board.threat_points(self.attacker, 3)
+            replies = near + [move for move in board.get_empty_point_list() if move not in near]
+        for move in replies:
+            board.play_move(move, color)
+            # a capture reply can reach 10 captures and end the game
+            is_terminal, winner = board.is_terminal()
+            won = winner == self.attacker if is_terminal else self._attack(threats, threes) != NO_POINT
+            board.undo()
+            if not won:
+                return False
+        return True
+
+
+def find_forced_win(board: GoBoard, deadline: Deadline = None, max_threes: int = 0) -> Tuple[GO_POINT, int]:
+    """
+    Returns a winning move for the player to move on board, or NO_POINT,
+    and the number of nodes searched. A VCF search runs first, and then
+    a VCT search if max_threes > 0.
+    """
+    search = ThreatSearch(board, deadline)
+    move = search.find_win(0)
+    if move == NO_POINT and max_threes > 0 and not search.aborted:
+        move = search.find_win(max_threes)
+    return move, search.nodes
@@ -0,0 +1,108 @@
+"""
+time_manager.py
+Time budgets for the iterative deepening search of ABPlayer.
+
+TimeManager decides how long a genmove may search, and whether the
+next iteration of the search can still finish within that budget.
+The budget is the per-move limit of the timelimit command, lowered
+to a share of the remaining game time once the GTP time_settings and
+time_left commands have been used.
+
+The cost of the next iteration is predicted from the completed ones:
+the next iteration is expected to take EBF times as long as the last
+one, where EBF is the effective branching factor of the node counts,
+or longer if the last step of the same parity grew faster.
+"""
+
+from typing import Dict, List, Tuple
+
+from board_base import BLACK, WHITE, GO_COLOR
+
+"""
+Moves still to play in the game assumed when sharing out the main time,
+at least MIN_MOVES_TO_GO and otherwise half the empty points
+"""
+MIN_MOVES_TO_GO = 10
+
+"""
+Seconds kept in reserve on the game clock for the GTP round trip
+"""
+CLOCK_RESERVE = 0.2
+
+"""
+Branching factor assumed before two iterations have completed
+"""
+DEFAULT_EBF = 5.0
+
+
+class TimeManager(object):
+    def __init__(self, time_limit: float = 1) -> None:
+        self.time_limit: float = time_limit
+        # game clock from time_settings, all 0 if not used
+        self.main_time: float = 0
+        self.byo_yomi_time: float = 0
+        self.byo_yomi_stones: int = 0
+        # (seconds, stones) left per color from time_left, stones 0 in main time
+        self.time_left: Dict[GO_COLOR, Tuple[float, int]] = {}
+        # (nodes, seconds) of the completed iterations of the current search
+        self.iterations: List[Tuple[int, float]] = []
+
+    def set_time_settings(self, main_time: float, byo_yomi_time: float, byo_yomi_stones: int) -> None:
+        self.main_time = main_time
+        self.byo_yomi_time = byo_yomi_time
+        self.byo_yomi_stones = byo_yomi_stones
+        self.time_left = {BLACK: (main_time, 0), WHITE: (main_time, 0)}
+
+    def set_time_left(self, color: GO_COLOR, seconds: float, stones: int) -> None:
+        self.time_left[color] = (seconds, stones)
+
+    def move_budget(self, color: GO_COLOR, num_empty: int) -> float:
+        """
+        Returns the seconds that color may use for its next move.
+        """
+        budget = self.time_limit
+        if color in self.time_left:
+            seconds, stones = self.time_left[color]
+            seconds = max(0.0, seconds - CLOCK_RESERVE)
+            if stones > 0:
+                # byo-yomi: share the period among its stones
+                budget = min(budget, seconds / stones)
+            elif self.main_time > 0 or self.byo_yomi_time > 0:
+                moves_to_go = max(MIN_MOVES_TO_GO, (num_empty + 1) // 2)
+                share = seconds / moves_to_go
+                if self.byo_yomi_stones > 0:
+                    share += self.byo_yomi_time / self.byo_yomi_stones
+                budget = min(budget, share, seconds)
+        return max(budget, 0.01)
+
+    def start_search(self) -> None:
+        self.iterations = []
+
+    def record_iteration(self, nodes: int, seconds: float) -> None:
+        self.iterations.append((nodes, seconds))
+
+    def ebf(self) -> float:
+        """
+        Effective branching factor of the completed iterations: the
+        geometric mean of the node count ratios of consecutive iterations.
+        Averaging smooths out the cheap first iterations that are
+        answered from the transposition table.
+        """
+        if len(self.iterations) < 2 or self.iterations[0][0] == 0:
+            return DEFAULT_EBF
+        ratio = self.iterations[-1][0] / self.iterations[0][0]
+        return max(1.0, ratio ** (1 / (len(self.iterations) - 1)))
+
+    def next_iteration_fits(self, elapsed: float, budget: float) -> bool:
+        """
+        Returns whether the next iteration is expected to complete
+        within budget, elapsed seconds into the search.
+        """
+        if not self.iterations:
+            return True
+        growth = self.ebf()
+        if len(self.iterations) >= 3 and self.iterations[-3][0] > 0:
+            # odd-even effect: the next step grows like the previous step
+            # of the same parity, which can be well above the mean
+            growth = max(growth, self.iterations[-2][0] / self.iterations[-3][0])
+        return elapsed + self.iterations[-1][1] * growth <= budget
@@ -0,0 +1,156 @@
+"""
+transposition.py
+Fixed-size transposition table for the alpha-beta search.
+
+Entries are keyed on GoBoard.hash. The table is split into buckets of
+two slots: slot 0 keeps the entry with the largest search depth
+(depth-preferred), slot 1 takes every other store (always-replace).
+
+Storage is three flat numpy arrays, so the memory use is fixed
+by the budget given at construction time. With shared=True the arrays
+live in a multiprocessing.shared_memory block, so that several search
+processes can use one table (see ABPlayer workers).
+
+The table has no locks. A slot stores key ^ data ^ value bits instead
+of the key, so an entry that is torn by concurrent writers fails the
+key check on probe and is treated as a miss.
+"""
+
+import numpy as np
+from multiprocessing import shared_memory
+from typing import Optional, Tuple
+
+from board_base import NO_POINT, GO_POINT
+
+"""
+Bound types of a stored value
+"""
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+"""
+Stored depth of solved entries. A solved value is a proven result,
+so it is valid for any remaining search depth.
+"""
+SOLVED_DEPTH = 255
+
+"""
+Bytes used per slot: key (8), packed data (8) and value (8)
+"""
+ENTRY_BYTES = 24
+
+TT_ENTRY = Tuple[int, int, int, GO_POINT, bool]
+
+
+def pack_data(depth: int, bound: int, move: GO_POINT, solved: bool) -> int:
+    """
+    Pack the integer fields of an entry into one word:
+    bits 0-7 depth, bits 8-9 bound, bit 10 solved, bits 11- move + 2
+    """
+    return depth | (bound << 8) | (int(solved) << 10) | ((int(move) + 2) << 11)
+
+
+def unpack_data(data: int) -> Tuple[int, int, GO_POINT, bool]:
+    return data & 0xFF, (data >> 8) & 0x3, (data >> 11) - 2, bool((data >> 10) & 1)
+
+
+class TranspositionTable(object):
+    def __init__(self, size_mb: float = 16, shared: bool = False) -> None:
+        """
+        Creates a table using at most size_mb megabytes.
+        The number of buckets is rounded down to a power of two.
+        """
+        num_buckets = 1
+        while 2 * num_buckets * 2 * ENTRY_BYTES <= size_mb * 1024 * 1024:
+            num_buckets *= 2
+        self.size_mb = size_mb
+        self.mask: int = num_buckets - 1
+        self.shm: Optional[shared_memory.SharedMemory] = None
+        if shared:
+            self.shm = shared_memory.SharedMemory(create=True, size=2 * num_buckets * ENTRY_BYTES)
+            self._map_arrays(self.shm.buf)
+            self.clear()
+        else:
+            self._map_arrays(bytearray(2 * num_buckets * ENTRY_BYTES))
+        self.hits = 0
+        self.stores = 0
+
+    def _map_arrays(self, buffer) -> None:
+        slots = 2 * (self.mask + 1)
+        self.keys: np.ndarray = np.ndarray(slots, dtype=np.uint64, buffer=buffer)
+        self.data: np.ndarray = np.ndarray(slots, dtype=np.int64, buffer=buffer, offset=8 * slots)
+        self.values: np.ndarray = np.ndarray(slots, dtype=np.int64, buffer=buffer, offset=16 * slots)
+        # the values as raw bits, for the key check
+        self.value_bits: np.ndarray = self.values.view(np.uint64)
+
+    def close(self) -> None:
+        """
+        Release the shared memory block of a shared table.
+        """
+        if self.shm is not None:
+            del self.keys, self.data, self.values, self.value_bits
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
+
+    def clear(self) -> None:
+        self.keys.fill(0)
+        self.data.fill(0)
+        self.values.fill(0)
+        self.hits = 0
+        self.stores = 0
+
+    def _stored_key(self, i: int) -> int:
+        return int(self.keys[i]) ^ int(self.data[i]) ^ int(self.value_bits[i])
+
+    def probe(self, key: int) -> Optional[TT_ENTRY]:
+        """
+        Returns (depth, bound, value, best move, solved) for key,
+        or None if the position is not in the table.
+        """
+        slot = (key & self.mask) << 1
+        for i in (slot, slot + 1):
+            data = int(self.data[i])
+            value = self.values[i]
+            if data != 0 and int(self.keys[i]) ^ data ^ int(value.view(np.uint64)) == key:
+                self.hits += 1
+                depth, bound, move, solved = unpack_data(data)
+                return depth, bound, int(value), move, solved
+        return None
+
+    def best_move(self, key: int) -> GO_POINT:
+        """
+        Returns the stored best move for key, or NO_POINT.
+        """
+        entry = self.probe(key)
+        if entry is None:
+            return NO_POINT
+        return entry[3]
+
+    def store(self, key: int, depth: int, bound: int, value: int,
+              move: GO_POINT, solved: bool) -> None:
+        """
+        Store a search result.
+        The new entry goes to slot 0 of the bucket if it is for the same
+        position or searched at least as deep, otherwise to slot 1.
+        """
+        if solved:
+            depth = SOLVED_DEPTH
+        depth = min(depth, SOLVED_DEPTH)
+        slot = (key & self.mask) << 1
+        if self._stored_key(slot) == key:
+            i = slot
+        elif depth >= (int(self.data[slot]) & 0xFF):
+            # the displaced entry moves down to the always-replace slot
+            i = slot
+            self.keys[slot + 1] = self.keys[slot]
+            self.data[slot + 1] = self.data[slot]
+            self.values[slot + 1] = self.values[slot]
+        else:
+            i = slot + 1
+        data = pack_data(depth, bound, move, solved)
+        self.data[i] = data
+        self.values[i] = value
+        self.keys[i] = key ^ data ^ int(self.value_bits[i])
+        self.stores += 1